@@ -0,0 +1,70 @@
+"""
+Track Flag Module
+Per-track boolean state stored as a growable NumPy mask indexed by track ID
+"""
+import numpy as np
+from typing import Iterable, Set, Tuple
+
+
+class TrackFlags:
+    """Set of non-negative integer track IDs backed by a boolean mask"""
+
+    def __init__(self, capacity: int = 1024):
+        """
+        Initialize track flags
+
+        Args:
+            capacity: Initial number of track IDs covered (grows as needed)
+        """
+        self.mask = np.zeros(capacity, dtype=bool)
+
+    def _ensure(self, max_id: int):
+        """Grow the mask (doubling) so that max_id is addressable"""
+        if max_id >= len(self.mask):
+            mask = np.zeros(max(max_id + 1, 2 * len(self.mask)), dtype=bool)
+            mask[:len(self.mask)] = self.mask
+            self.mask = mask
+
+    def __contains__(self, track_id: int) -> bool:
+        return 0 <= track_id < len(self.mask) and bool(self.mask[track_id])
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.mask))
+
+    def add(self, track_id: int):
+        """Set the flag of a track"""
+        self._ensure(track_id)
+        self.mask[track_id] = True
+
+    def discard(self, track_id: int):
+        """Clear the flag of a track if set"""
+        if 0 <= track_id < len(self.mask):
+            self.mask[track_id] = False
+
+    def clear(self):
+        """Clear all flags"""
+        self.mask[:] = False
+
+    def update(self, track_ids: Iterable[int], flags: Iterable[bool]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Set the flags of many tracks at once and report the transitions
+
+        Args:
+            track_ids: Track IDs
+            flags: New flag per track ID
+
+        Returns:
+            (newly_set, newly_cleared) boolean arrays aligned with track_ids
+        """
+        ids = np.asarray(track_ids, dtype=np.int64).reshape(-1)
+        new = np.asarray(flags, dtype=bool).reshape(-1)
+        if len(ids) == 0:
+            return new, new
+        self._ensure(int(ids.max()))
+        old = self.mask[ids]
+        self.mask[ids] = new
+        return new & ~old, old & ~new
+
+    def to_set(self) -> Set[int]:
+        """Get the flagged track IDs as a set"""
+        return set(np.flatnonzero(self.mask).tolist())
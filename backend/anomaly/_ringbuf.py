@@ -0,0 +1,80 @@
+"""
+Ring Buffer Module
+Fixed-capacity per-track history backed by a single preallocated NumPy array
+"""
+import numpy as np
+from typing import Optional, Tuple
+
+
+class RingBuffer:
+    """FIFO of equally-shaped rows that overwrites the oldest row when full"""
+
+    def __init__(self, capacity: int, item_shape: Tuple[int, ...] = (), dtype=np.float32):
+        """
+        Initialize ring buffer
+
+        Args:
+            capacity: Maximum number of rows kept
+            item_shape: Shape of each row, e.g. (2,) for (x, y) or (33, 3) for pose keypoints
+            dtype: Element dtype
+        """
+        self.data = np.empty((capacity,) + tuple(item_shape), dtype=dtype)
+        self.head = 0  # next write index
+        self.count = 0  # number of valid rows
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of rows kept"""
+        return len(self.data)
+
+    def push(self, item):
+        """
+        Append a row, overwriting the oldest one when full
+
+        Args:
+            item: Row of shape item_shape
+        """
+        self.data[self.head] = item
+        self.head = (self.head + 1) % len(self.data)
+        self.count = min(self.count + 1, len(self.data))
+
+    def last(self, n: Optional[int] = None) -> np.ndarray:
+        """
+        Get the most recent rows in chronological order
+
+        Args:
+            n: Number of rows to return (all valid rows if None)
+
+        Returns:
+            Array of shape (min(n, count),) + item_shape; a view into the buffer
+            unless the requested window wraps around
+        """
+        n = self.count if n is None else min(n, self.count)
+        start = self.head - n
+        if start >= 0:
+            return self.data[start:self.head]
+        return np.concatenate((self.data[start:], self.data[:self.head]))
+
+    def latest(self) -> np.ndarray:
+        """Get the most recently pushed row"""
+        return self.data[self.head - 1]
+
+    def grow(self, capacity: int):
+        """
+        Reallocate with a larger capacity, preserving the stored rows
+
+        Args:
+            capacity: New capacity (ignored if not larger than the current one)
+        """
+        if capacity <= len(self.data):
+            return
+
+        rows = self.last()
+        data = np.empty((capacity,) + self.data.shape[1:], dtype=self.data.dtype)
+        data[:len(rows)] = rows
+        self.data = data
+        self.head = len(rows) % capacity
+        self.count = len(rows)
@@ -0,0 +1,106 @@
+"""
+Result Types Module
+Immutable, slotted result objects returned by the anomaly detectors
+"""
+from dataclasses import dataclass
+from typing import Any, ClassVar, Dict, Optional, Tuple
+
+
+class _Result:
+    """
+    Mapping-style read access shared by the result types
+
+    Detectors used to return plain dicts, so results still support
+    ``result['key']`` and ``result.get('key')``. Convert with ``to_dict()``
+    at the serialization boundary or when the caller needs to add keys.
+    """
+    __slots__ = ()
+
+    # Keys exported by to_dict(), in order (fields and derived properties)
+    _keys: ClassVar[Tuple[str, ...]] = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._keys:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a value by key, returning default for unknown keys or unset values"""
+        value = getattr(self, key, None) if key in self._keys else None
+        return default if value is None else value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a plain dict for JSON serialization"""
+        return {key: getattr(self, key) for key in self._keys}
+
+
+@dataclass(frozen=True, slots=True)
+class OvercrowdingResult(_Result):
+    """Result of OvercrowdingDetector.detect_overcrowding"""
+    is_overcrowded: bool
+    current_count: int
+    threshold: int
+    alert_triggered: bool
+    severity: str
+
+    _keys: ClassVar[Tuple[str, ...]] = (
+        'is_overcrowded', 'current_count', 'threshold', 'alert_triggered', 'severity'
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class LoiteringResult(_Result):
+    """Result of LoiteringDetector.detect_loitering"""
+    is_loitering: bool
+    track_id: int
+    duration_frames: int
+    movement_distance: float
+    alert_triggered: bool
+    position: Optional[Tuple[float, float]] = None
+    fps: float = 30.0
+
+    _keys: ClassVar[Tuple[str, ...]] = (
+        'is_loitering', 'track_id', 'duration_frames', 'duration_seconds',
+        'movement_distance', 'alert_triggered', 'position'
+    )
+
+    @property
+    def duration_seconds(self) -> float:
+        """Duration of the analyzed window in seconds"""
+        return self.duration_frames / self.fps
+
+
+@dataclass(frozen=True, slots=True)
+class ZoneViolationResult(_Result):
+    """Result of ZoneViolationDetector.detect_zone_violation"""
+    is_violation: bool
+    violated_zones: Tuple[int, ...] = ()
+    point: Optional[Tuple[float, float]] = None
+    alert_triggered: bool = False
+    track_id: Optional[int] = None
+
+    _keys: ClassVar[Tuple[str, ...]] = (
+        'is_violation', 'violated_zones', 'point', 'alert_triggered', 'track_id'
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class SuspiciousResult(_Result):
+    """Result of SuspiciousActivityDetector.detect_fight_like_motion"""
+    is_suspicious: bool
+    alert_triggered: bool = False
+    track_id: Optional[int] = None
+    max_velocity: Optional[float] = None
+    mean_velocity: Optional[float] = None
+    arm_velocity: Optional[float] = None
+    frac_exceed: Optional[float] = None
+    frames_analyzed: int = 0
+    activity_type: str = 'normal'
+
+    _keys: ClassVar[Tuple[str, ...]] = (
+        'is_suspicious', 'track_id', 'max_velocity', 'mean_velocity', 'arm_velocity',
+        'frac_exceed', 'frames_analyzed', 'alert_triggered', 'activity_type'
+    )
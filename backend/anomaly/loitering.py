@@ -2,10 +2,16 @@
 Loitering Detection Module
 Detects when people stay in one location for too long
 """
+import math
 import numpy as np
-from typing import Dict, List, Tuple
-from collections import defaultdict
+from typing import Deque, Dict, List, Sequence, Set, Tuple
+from collections import deque
 import logging
+import threading
+
+from ._bitset import TrackFlags
+from ._ringbuf import RingBuffer
+from ._types import LoiteringResult
 
 logger = logging.getLogger(__name__)
 
@@ -27,10 +33,25 @@ class LoiteringDetector:
         self.fps = fps
         self.frame_threshold = time_threshold * fps
         
-        # Track history: {track_id: [(x, y, frame_num), ...]}
-        self.track_history = defaultdict(list)
-        self.loitering_tracks = set()
+        # Track history: {track_id: ring buffer of float32 (x, y) rows}
+        self.track_buffers: Dict[int, RingBuffer] = {}
+        
+        # Sliding-window extrema over the last frame_threshold samples:
+        # {track_id: [max_x, min_x, max_y, min_y]}, each a monotonic deque of (sample_index, value)
+        self.track_extrema: Dict[int, List[Deque[Tuple[int, float]]]] = {}
+        self.track_totals: Dict[int, int] = {}  # samples seen since the track started
+        self.track_windows: Dict[int, int] = {}  # window the extrema were built for
+        self._loitering = TrackFlags()  # tracks currently flagged as loitering
         
+        # Guards the per-track state: batches run on worker threads while another route
+        # may clean up tracks on the event loop
+        self._lock = threading.RLock()
+    
+    @property
+    def loitering_tracks(self) -> Set[int]:
+        """IDs of tracks currently flagged as loitering"""
+        return self._loitering.to_set()
+    
     def update_track(self, track_id: int, center_point: Tuple[float, float], frame_num: int):
         """
         Update track history with new position
@@ -40,15 +61,72 @@ class LoiteringDetector:
             center_point: (x, y) center coordinates
             frame_num: Current frame number
         """
-        self.track_history[track_id].append((center_point[0], center_point[1], frame_num))
+        with self._lock:
+            # Keep only recent history (last time_threshold seconds)
+            capacity = self.frame_threshold + 100  # Keep some buffer
+            buf = self.track_buffers.get(track_id)
+            if buf is None:
+                buf = self.track_buffers[track_id] = RingBuffer(capacity, (2,), np.float32)
+            elif buf.capacity < capacity:
+                buf.grow(capacity)
+            buf.push(center_point)
+        
+            total = self.track_totals.get(track_id, 0)
+            self.track_totals[track_id] = total + 1
+            if self.track_windows.get(track_id) == self.frame_threshold:
+                self._push_extrema(track_id, total, float(center_point[0]), float(center_point[1]))
+            else:
+                self._rebuild_extrema(track_id)
+    
+    def _push_extrema(self, track_id: int, seq: int, x: float, y: float):
+        """
+        Push a sample into the sliding-window extrema of a track in O(1) amortized time
+        
+        Args:
+            track_id: Track identifier
+            seq: Sample index within the track
+            x: X coordinate
+            y: Y coordinate
+        """
+        max_x, min_x, max_y, min_y = self.track_extrema[track_id]
+        oldest = seq - self.track_windows[track_id] + 1
+        self._push_monotonic(max_x, seq, x, oldest, keep_max=True)
+        self._push_monotonic(min_x, seq, x, oldest, keep_max=False)
+        self._push_monotonic(max_y, seq, y, oldest, keep_max=True)
+        self._push_monotonic(min_y, seq, y, oldest, keep_max=False)
+    
+    def _rebuild_extrema(self, track_id: int):
+        """
+        Rebuild the sliding-window extrema of a track from its ring buffer
+        (needed when the track is new or frame_threshold has changed)
+        
+        Args:
+            track_id: Track identifier
+        """
+        window = max(1, int(self.frame_threshold))
+        self.track_extrema[track_id] = [deque(), deque(), deque(), deque()]
+        self.track_windows[track_id] = window
         
-        # Keep only recent history (last time_threshold seconds)
-        max_history = self.frame_threshold + 100  # Keep some buffer
-        if len(self.track_history[track_id]) > max_history:
-            self.track_history[track_id] = self.track_history[track_id][-max_history:]
+        coords = self.track_buffers[track_id].last(window)
+        first_seq = self.track_totals.get(track_id, 0) - len(coords)
+        for i, (x, y) in enumerate(coords.tolist()):
+            self._push_extrema(track_id, first_seq + i, x, y)
+    
+    @staticmethod
+    def _push_monotonic(dq: Deque[Tuple[int, float]], seq: int, value: float, oldest: int, keep_max: bool):
+        """Push into a monotonic deque and evict samples that left the window"""
+        if keep_max:
+            while dq and dq[-1][1] <= value:
+                dq.pop()
+        else:
+            while dq and dq[-1][1] >= value:
+                dq.pop()
+        dq.append((seq, value))
+        while dq[0][0] < oldest:
+            dq.popleft()
     
     def detect_loitering(self, track_id: int, history: List[Tuple] = None, 
-                        pixel_threshold: float = None, time_threshold: int = None) -> Dict:
+                        pixel_threshold: float = None, time_threshold: int = None) -> LoiteringResult:
         """
         Detect if a track is loitering
         
@@ -59,51 +137,164 @@ class LoiteringDetector:
             time_threshold: Override default time threshold (in frames)
             
         Returns:
-            Dictionary with loitering detection results
-        """
-        active_pixel_threshold = pixel_threshold if pixel_threshold is not None else self.pixel_threshold
-        active_time_threshold = time_threshold if time_threshold is not None else self.frame_threshold
-        
-        # Use provided history or stored history
-        track_positions = history if history is not None else self.track_history.get(track_id, [])
-        
-        if len(track_positions) < active_time_threshold:
-            return {
-                'is_loitering': False,
-                'track_id': track_id,
-                'duration_frames': len(track_positions),
-                'movement_distance': 0.0,
-                'alert_triggered': False
-            }
-        
-        # Check movement over the threshold period
-        recent_positions = track_positions[-int(active_time_threshold):]
-        
-        # Calculate total movement
-        total_movement = self._calculate_movement(recent_positions)
-        
-        # Check if movement is below threshold
-        is_loitering = total_movement < active_pixel_threshold
-        
-        # Trigger alert on state change
-        alert_triggered = False
-        if is_loitering and track_id not in self.loitering_tracks:
-            alert_triggered = True
-            self.loitering_tracks.add(track_id)
-            logger.warning(f"Loitering detected for track {track_id}: movement={total_movement:.2f}px over {len(recent_positions)} frames")
-        elif not is_loitering and track_id in self.loitering_tracks:
-            self.loitering_tracks.remove(track_id)
-        
-        return {
-            'is_loitering': is_loitering,
-            'track_id': track_id,
-            'duration_frames': len(recent_positions),
-            'duration_seconds': len(recent_positions) / self.fps,
-            'movement_distance': total_movement,
-            'alert_triggered': alert_triggered,
-            'position': recent_positions[-1][:2] if recent_positions else None
-        }
+            LoiteringResult with loitering detection results
+        """
+        with self._lock:
+            active_pixel_threshold = pixel_threshold if pixel_threshold is not None else self.pixel_threshold
+            active_time_threshold = time_threshold if time_threshold is not None else self.frame_threshold
+        
+            # Use provided history or stored history
+            if history is not None:
+                num_positions = len(history)
+            else:
+                buf = self.track_buffers.get(track_id)
+                num_positions = len(buf) if buf is not None else 0
+        
+            if num_positions < active_time_threshold:
+                return LoiteringResult(
+                    is_loitering=False,
+                    track_id=track_id,
+                    duration_frames=num_positions,
+                    movement_distance=0.0,
+                    alert_triggered=False,
+                    fps=self.fps
+                )
+        
+            # Check movement over the threshold period
+            window = int(active_time_threshold) or num_positions
+            duration = min(window, num_positions)
+        
+            if history is not None:
+                coords = np.asarray(history[-window:], dtype=np.float32).reshape(duration, -1)
+                total_movement = self._bbox_movement(coords[:, 0], coords[:, 1])
+                position = (float(coords[-1, 0]), float(coords[-1, 1]))
+            else:
+                if window == self.frame_threshold:
+                    # O(1): read the movement off the sliding-window extrema
+                    if self.track_windows.get(track_id) != window:
+                        self._rebuild_extrema(track_id)
+                    max_x, min_x, max_y, min_y = self.track_extrema[track_id]
+                    total_movement = 0.5 * math.hypot(max_x[0][1] - min_x[0][1], max_y[0][1] - min_y[0][1])
+                else:
+                    coords = buf.last(window)
+                    total_movement = self._bbox_movement(coords[:, 0], coords[:, 1])
+                x, y = buf.latest().tolist()
+                position = (x, y)
+        
+            # Check if movement is below threshold
+            is_loitering = total_movement < active_pixel_threshold
+        
+            # Trigger alert on state change
+            alert_triggered = False
+            if is_loitering and track_id not in self._loitering:
+                alert_triggered = True
+                self._loitering.add(track_id)
+                logger.warning(f"Loitering detected for track {track_id}: movement={total_movement:.2f}px over {duration} frames")
+            elif not is_loitering and track_id in self._loitering:
+                self._loitering.discard(track_id)
+        
+            return LoiteringResult(
+                is_loitering=bool(is_loitering),
+                track_id=track_id,
+                duration_frames=duration,
+                movement_distance=float(total_movement),
+                alert_triggered=alert_triggered,
+                position=position,
+                fps=self.fps
+            )
     
+    def update_tracks_and_detect(self, track_ids: Sequence[int], center_points: Sequence[Tuple[float, float]],
+                                 frame_num: int) -> List[LoiteringResult]:
+        """
+        Update the history of all tracks of a frame, then check them for loitering
+
+        Args:
+            track_ids: Track IDs
+            center_points: (x, y) center coordinates, one per track ID
+            frame_num: Current frame number
+
+        Returns:
+            List of LoiteringResult, one per track ID
+        """
+        with self._lock:
+            self.update_tracks(track_ids, center_points, frame_num)
+            return self.detect_loitering_batch(track_ids)
+
+    def update_tracks(self, track_ids: Sequence[int], center_points: Sequence[Tuple[float, float]],
+                      frame_num: int):
+        """
+        Update the history of all tracks of a frame
+
+        Args:
+            track_ids: Track IDs
+            center_points: (N, 2) array-like of (x, y) center coordinates, one row per track ID
+            frame_num: Current frame number
+        """
+        with self._lock:
+            # Convert once so the per-track updates work on Python floats, not NumPy scalars
+            centers = np.asarray(center_points, dtype=np.float64).reshape(-1, 2).tolist()
+            for track_id, center_point in zip(track_ids, centers):
+                self.update_track(track_id, center_point, frame_num)
+
+    def detect_loitering_batch(self, track_ids: Sequence[int]) -> List[LoiteringResult]:
+        """
+        Detect loitering for many tracks at once using the stored history
+
+        Args:
+            track_ids: Track IDs to check
+
+        Returns:
+            List of LoiteringResult, one per track ID
+        """
+        with self._lock:
+            window = max(1, int(self.frame_threshold))
+            counts = [len(self.track_buffers[tid]) if tid in self.track_buffers else 0 for tid in track_ids]
+            ready = [tid for tid, n in zip(track_ids, counts) if n >= self.frame_threshold]
+
+            # (K, 4) window extrema [max_x, min_x, max_y, min_y] -> movement in one pass
+            for tid in ready:
+                if self.track_windows.get(tid) != window:
+                    self._rebuild_extrema(tid)
+            extrema = np.array(
+                [[dq[0][1] for dq in self.track_extrema[tid]] for tid in ready], dtype=np.float64
+            ).reshape(-1, 4)
+            movement = 0.5 * np.hypot(extrema[:, 0] - extrema[:, 1], extrema[:, 2] - extrema[:, 3])
+            is_loitering = movement < self.pixel_threshold
+
+            # Alert on state changes per track ID
+            newly_loitering, _ = self._loitering.update(ready, is_loitering)
+
+            state_by_id = dict(zip(ready, zip(movement.tolist(), is_loitering.tolist(), newly_loitering.tolist())))
+            results = []
+            for track_id, num_positions in zip(track_ids, counts):
+                if track_id not in state_by_id:
+                    results.append(LoiteringResult(
+                        is_loitering=False,
+                        track_id=track_id,
+                        duration_frames=num_positions,
+                        movement_distance=0.0,
+                        alert_triggered=False,
+                        fps=self.fps
+                    ))
+                    continue
+
+                duration = min(window, num_positions)
+                total_movement, loitering, alert_triggered = state_by_id[track_id]
+                if alert_triggered:
+                    logger.warning(f"Loitering detected for track {track_id}: movement={total_movement:.2f}px over {duration} frames")
+                x, y = self.track_buffers[track_id].latest().tolist()
+                results.append(LoiteringResult(
+                    is_loitering=loitering,
+                    track_id=track_id,
+                    duration_frames=duration,
+                    movement_distance=total_movement,
+                    alert_triggered=alert_triggered,
+                    position=(x, y),
+                    fps=self.fps
+                ))
+
+            return results
+
     @staticmethod
     def _calculate_movement(positions: List[Tuple]) -> float:
         """
@@ -113,20 +304,30 @@ class LoiteringDetector:
             positions: List of (x, y, frame) tuples
             
         Returns:
-            Total Euclidean distance moved
+            Half the diagonal of the bounding box of the positions
         """
         if len(positions) < 2:
             return 0.0
         
-        # Calculate max displacement from mean position
-        coords = np.array([(p[0], p[1]) for p in positions])
-        mean_pos = np.mean(coords, axis=0)
+        coords = np.asarray(positions, dtype=np.float32).reshape(len(positions), -1)
+        return LoiteringDetector._bbox_movement(coords[:, 0], coords[:, 1])
+    
+    @staticmethod
+    def _bbox_movement(xs: np.ndarray, ys: np.ndarray) -> float:
+        """
+        Calculate movement as half the diagonal of the bounding box of the positions
         
-        # Calculate maximum distance from mean
-        distances = np.sqrt(np.sum((coords - mean_pos) ** 2, axis=1))
-        max_distance = np.max(distances)
+        Args:
+            xs: X coordinates
+            ys: Y coordinates
+            
+        Returns:
+            Movement distance in pixels
+        """
+        if len(xs) < 2:
+            return 0.0
         
-        return float(max_distance)
+        return 0.5 * float(np.hypot(np.ptp(xs), np.ptp(ys)))
     
     def cleanup_old_tracks(self, active_track_ids: List[int]):
         """
@@ -135,8 +336,12 @@ class LoiteringDetector:
         Args:
             active_track_ids: List of currently active track IDs
         """
-        all_track_ids = list(self.track_history.keys())
-        for track_id in all_track_ids:
-            if track_id not in active_track_ids:
-                del self.track_history[track_id]
-                self.loitering_tracks.discard(track_id)
+        with self._lock:
+            active = set(active_track_ids)
+            for track_id in list(self.track_buffers.keys()):
+                if track_id not in active:
+                    del self.track_buffers[track_id]
+                    self.track_extrema.pop(track_id, None)
+                    self.track_totals.pop(track_id, None)
+                    self.track_windows.pop(track_id, None)
+                    self._loitering.discard(track_id)
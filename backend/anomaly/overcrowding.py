@@ -2,12 +2,36 @@
 Overcrowding Detection Module
 Detects when the number of people exceeds a threshold
 """
-from typing import Dict, Optional
+from functools import lru_cache
+from typing import Optional
 import logging
 
+from ._types import OvercrowdingResult
+
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=4096)
+def _calculate_severity(count: int, threshold: int) -> str:
+    """
+    Calculate severity level of overcrowding
+    
+    Returns:
+        'none', 'low', 'medium', or 'high'
+    """
+    if count <= threshold:
+        return 'none'
+    
+    ratio = count / threshold
+    
+    if ratio <= 1.2:
+        return 'low'
+    elif ratio <= 1.5:
+        return 'medium'
+    else:
+        return 'high'
+
+
 class OvercrowdingDetector:
     """Detects overcrowding based on people count"""
     
@@ -21,7 +45,11 @@ class OvercrowdingDetector:
         self.threshold = threshold
         self.alert_active = False
         
-    def detect_overcrowding(self, count: int, threshold: Optional[int] = None) -> Dict:
+        # Last (count, threshold, alert_active) inputs and the result they produced
+        self._last_key = None
+        self._last_result = None
+        
+    def detect_overcrowding(self, count: int, threshold: Optional[int] = None) -> OvercrowdingResult:
         """
         Detect if overcrowding is occurring
         
@@ -30,10 +58,14 @@ class OvercrowdingDetector:
             threshold: Override default threshold
             
         Returns:
-            Dictionary with detection results
+            OvercrowdingResult (the same immutable instance while the inputs are unchanged)
         """
         active_threshold = threshold if threshold is not None else self.threshold
         
+        key = (count, active_threshold, self.alert_active)
+        if key == self._last_key:
+            return self._last_result
+        
         is_overcrowded = count > active_threshold
         
         # Trigger alert on state change
@@ -44,33 +76,20 @@ class OvercrowdingDetector:
         
         self.alert_active = is_overcrowded
         
-        return {
-            'is_overcrowded': is_overcrowded,
-            'current_count': count,
-            'threshold': active_threshold,
-            'alert_triggered': alert_triggered,
-            'severity': self._calculate_severity(count, active_threshold)
-        }
+        self._last_key = key
+        self._last_result = OvercrowdingResult(
+            is_overcrowded=is_overcrowded,
+            current_count=count,
+            threshold=active_threshold,
+            alert_triggered=alert_triggered,
+            severity=_calculate_severity(count, active_threshold)
+        )
+        return self._last_result
     
     @staticmethod
     def _calculate_severity(count: int, threshold: int) -> str:
-        """
-        Calculate severity level of overcrowding
-        
-        Returns:
-            'low', 'medium', or 'high'
-        """
-        if count <= threshold:
-            return 'none'
-        
-        ratio = count / threshold
-        
-        if ratio <= 1.2:
-            return 'low'
-        elif ratio <= 1.5:
-            return 'medium'
-        else:
-            return 'high'
+        """Calculate severity level of overcrowding (memoized)"""
+        return _calculate_severity(count, threshold)
     
     def set_threshold(self, threshold: int):
         """Update the threshold"""
@@ -2,15 +2,119 @@
 Suspicious Activity Detection Module
 Detects fight-like anomalies using pose estimation
 """
-import cv2
+import asyncio
+import math
 import numpy as np
-import mediapipe as mp
-from typing import List, Dict, Tuple, Optional
-from collections import defaultdict
+from typing import List, Dict, Set, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import logging
 
+from ._bitset import TrackFlags
+from ._ringbuf import RingBuffer
+from ._types import SuspiciousResult
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to the NumPy kernel
+    njit = None
+
 logger = logging.getLogger(__name__)
 
+# mediapipe (and cv2) are heavy to import, so they are loaded on first use
+_mp = None
+
+
+def _mediapipe():
+    """Import mediapipe once, on first use"""
+    global _mp
+    if _mp is None:
+        import mediapipe
+        _mp = mediapipe
+    return _mp
+
+# Input resolution of the MediaPipe pose landmark model
+POSE_INPUT_SIZE = 256
+
+# Shoulders, elbows, wrists
+ARM_INDICES = np.array([11, 12, 13, 14, 15, 16], dtype=np.int64)
+ARM_JOINTS = tuple(ARM_INDICES.tolist())
+
+
+def _velocity_stats_numpy(poses: np.ndarray, arm_indices: np.ndarray,
+                          threshold: float) -> Tuple[float, float, float, float]:
+    """
+    Compute joint velocity statistics over a pose sequence
+    
+    Args:
+        poses: Keypoints tensor of shape (T, J, 3) with (x, y, visibility)
+        arm_indices: Indices of arm joints
+        threshold: Velocity threshold for the exceed fraction
+        
+    Returns:
+        (max_velocity, mean_velocity, frac_exceed, arm_velocity)
+    """
+    if poses.shape[0] < 2:
+        return 0.0, 0.0, 0.0, 0.0
+    
+    # Visibility-weighted Euclidean displacement of each joint between frames
+    diff = poses[1:, :, :2] - poses[:-1, :, :2]
+    visibility = 0.5 * (poses[1:, :, 2] + poses[:-1, :, 2])
+    velocities = np.hypot(diff[..., 0], diff[..., 1]) * visibility
+    
+    arm_velocities = velocities[:, arm_indices[arm_indices < velocities.shape[1]]]
+    arm_velocity = float(arm_velocities.mean()) if arm_velocities.size > 0 else 0.0
+    
+    return (float(velocities.max()), float(velocities.mean()),
+            float(np.mean(velocities > threshold)), arm_velocity)
+
+
+@lru_cache(maxsize=None)
+def _make_velocity_kernel(num_frames: int, num_joints: int, arm_indices: Tuple[int, ...]):
+    """
+    Build _velocity_stats_numpy specialized on a fixed sequence shape
+    
+    The frame count, joint count and arm joints are baked in as compile-time constants
+    so numba can fully unroll the arm loop and vectorize across joints.
+    
+    Args:
+        num_frames: Number of frames T in the sequence
+        num_joints: Number of joints J per frame
+        arm_indices: Indices of arm joints
+        
+    Returns:
+        Function (poses, threshold) -> (max_velocity, mean_velocity, frac_exceed, arm_velocity)
+        taking a contiguous float32 (T, J, 3) tensor
+    """
+    arm = tuple(j for j in arm_indices if j < num_joints)
+    if njit is None or num_frames < 2 or not arm:
+        arm_array = np.array(arm, dtype=np.int64)
+        return lambda poses, threshold: _velocity_stats_numpy(poses, arm_array, threshold)
+    
+    n = (num_frames - 1) * num_joints
+    arm_n = (num_frames - 1) * len(arm)
+    
+    def kernel(poses, threshold):
+        max_velocity = 0.0
+        total = 0.0
+        exceed = 0
+        arm_total = 0.0
+        for t in range(1, num_frames):
+            for j in range(num_joints):
+                dx = poses[t, j, 0] - poses[t - 1, j, 0]
+                dy = poses[t, j, 1] - poses[t - 1, j, 1]
+                v = math.sqrt(dx * dx + dy * dy) * 0.5 * (poses[t, j, 2] + poses[t - 1, j, 2])
+                max_velocity = max(max_velocity, v)
+                total += v
+                exceed += v > threshold
+            for j in arm:
+                dx = poses[t, j, 0] - poses[t - 1, j, 0]
+                dy = poses[t, j, 1] - poses[t - 1, j, 1]
+                arm_total += math.sqrt(dx * dx + dy * dy) * 0.5 * (poses[t, j, 2] + poses[t - 1, j, 2])
+        return max_velocity, total / n, exceed / n, arm_total / arm_n
+    
+    return njit(cache=True, fastmath=True, nogil=True)(kernel)
+
 
 class SuspiciousActivityDetector:
     """Detects suspicious activities like fights using pose estimation"""
@@ -27,7 +131,7 @@ class SuspiciousActivityDetector:
         self.min_frames = min_frames
         
         # Initialize MediaPipe Pose
-        self.mp_pose = mp.solutions.pose
+        self.mp_pose = _mediapipe().solutions.pose
         self.pose = self.mp_pose.Pose(
             static_image_mode=False,
             model_complexity=1,
@@ -36,10 +140,32 @@ class SuspiciousActivityDetector:
             min_tracking_confidence=0.5
         )
         
-        # Track pose history: {track_id: [keypoints_sequence]}
-        self.pose_history = defaultdict(list)
-        self.suspicious_tracks = set()
+        # Track pose history: {track_id: ring buffer of float16 (33, 3) keypoint rows}
+        # (half precision is ample for pixel coordinates/visibility and halves the working set)
+        self.max_history = 100
+        self.pose_history: Dict[int, RingBuffer] = {}
+        self._suspicious = TrackFlags()  # tracks currently flagged as suspicious
+        
+        # Persistent worker that owns all MediaPipe inference, so the graph is only ever
+        # driven from one thread and async callers don't block the event loop; every
+        # public entry point (sync or async) hands the work to it
+        self._pose_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pose")
+        
+        # Reusable BGR->RGB conversion target, grown on demand to the largest region seen
+        # (only touched by the pose worker, via _extract_poses_batch)
+        self._rgb_buf = np.empty((0, 0, 3), dtype=np.uint8)
+        
+        # Build the velocity kernel for the default shape now so JIT compilation doesn't
+        # stall the first frames
+        _make_velocity_kernel(self.min_frames, 33, ARM_JOINTS)(
+            np.zeros((self.min_frames, 33, 3), dtype=np.float32), self.velocity_threshold
+        )
         
+    @property
+    def suspicious_tracks(self) -> Set[int]:
+        """IDs of tracks currently flagged as suspicious"""
+        return self._suspicious.to_set()
+    
     def extract_pose(self, frame: np.ndarray, bbox: List[float]) -> Optional[np.ndarray]:
         """
         Extract pose keypoints from person bounding box
@@ -49,42 +175,102 @@ class SuspiciousActivityDetector:
             bbox: Bounding box [x1, y1, x2, y2]
             
         Returns:
-            Keypoints array of shape (33, 3) or None if detection fails
+            float16 keypoints array of shape (33, 3) or None if detection fails
         """
-        x1, y1, x2, y2 = map(int, bbox)
+        return self.extract_poses_batch(frame, [bbox])[0]
+    
+    def extract_poses_batch(self, frame: np.ndarray, bboxes: List[List[float]]) -> List[Optional[np.ndarray]]:
+        """
+        Extract pose keypoints for all person bounding boxes in a frame (blocking; runs
+        on the pose worker thread)
         
-        # Ensure valid crop
-        h, w = frame.shape[:2]
-        x1, y1 = max(0, x1), max(0, y1)
-        x2, y2 = min(w, x2), min(h, y2)
+        Args:
+            frame: Input frame
+            bboxes: Bounding boxes [[x1, y1, x2, y2], ...]
+            
+        Returns:
+            List with a float16 (33, 3) keypoints array (or None if detection fails) per bounding box
+        """
+        return self._pose_executor.submit(self._extract_poses_batch, frame, bboxes).result()
+    
+    def _extract_poses_batch(self, frame: np.ndarray, bboxes: List[List[float]]) -> List[Optional[np.ndarray]]:
+        """extract_poses_batch body; only ever run on the pose worker thread"""
+        import cv2
         
-        if x2 <= x1 or y2 <= y1:
-            return None
+        poses: List[Optional[np.ndarray]] = [None] * len(bboxes)
+        if len(bboxes) == 0:
+            return poses
         
-        person_crop = frame[y1:y2, x1:x2]
+        # Ensure valid crops
+        h, w = frame.shape[:2]
+        boxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4).astype(np.int64)
+        boxes[:, 0::2] = np.clip(boxes[:, 0::2], 0, w)
+        boxes[:, 1::2] = np.clip(boxes[:, 1::2], 0, h)
+        valid = np.flatnonzero((boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1]))
+        if len(valid) == 0:
+            return poses
         
-        if person_crop.size == 0:
-            return None
+        for i in valid:
+            x1, y1, x2, y2 = boxes[i].tolist()
+            
+            # Downscale large crops to the pose model's input size before the color
+            # conversion (MediaPipe would resize them anyway); keeps the aspect ratio
+            person_crop = frame[y1:y2, x1:x2]
+            scale = POSE_INPUT_SIZE / max(x2 - x1, y2 - y1)
+            if scale < 1:
+                size = (max(1, round((x2 - x1) * scale)), max(1, round((y2 - y1) * scale)))
+                person_crop = cv2.resize(person_crop, size, interpolation=cv2.INTER_LINEAR)
+            person_rgb = self._to_rgb(person_crop)
+            
+            # Process with MediaPipe
+            results = self.pose.process(person_rgb)
+            
+            if results.pose_landmarks:
+                # Convert landmarks (normalized [0,1] within the crop) to pixel coordinates in original frame space
+                keypoints = np.array([(lm.x, lm.y, lm.visibility) for lm in results.pose_landmarks.landmark])
+                keypoints[:, 0] = x1 + keypoints[:, 0] * (x2 - x1)
+                keypoints[:, 1] = y1 + keypoints[:, 1] * (y2 - y1)
+                poses[i] = keypoints.astype(np.float16)
         
-        # Convert BGR to RGB
-        person_rgb = cv2.cvtColor(person_crop, cv2.COLOR_BGR2RGB)
+        return poses
+    
+    def _to_rgb(self, bgr: np.ndarray) -> np.ndarray:
+        """
+        Convert a BGR image into the reusable RGB buffer
         
-        # Process with MediaPipe
-        results = self.pose.process(person_rgb)
+        Args:
+            bgr: BGR image
+            
+        Returns:
+            RGB view into the buffer, valid until the next conversion
+        """
+        import cv2
         
-        if results.pose_landmarks:
-            # Extract keypoints and convert to pixel coordinates in original frame space
-            keypoints = []
-            crop_w = max(1, x2 - x1)
-            crop_h = max(1, y2 - y1)
-            for landmark in results.pose_landmarks.landmark:
-                # landmark.x/y are normalized [0,1] within the crop
-                x_px = x1 + float(landmark.x) * crop_w
-                y_px = y1 + float(landmark.y) * crop_h
-                keypoints.append([x_px, y_px, float(landmark.visibility)])
-            return np.array(keypoints)
+        h, w = bgr.shape[:2]
+        buf_h, buf_w = self._rgb_buf.shape[:2]
+        if h > buf_h or w > buf_w:
+            self._rgb_buf = np.empty((max(h, buf_h), max(w, buf_w), 3), dtype=np.uint8)
+        return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=self._rgb_buf[:h, :w])
+    
+    async def extract_poses_async(self, frame: np.ndarray,
+                                  bboxes: List[List[float]]) -> List[Optional[np.ndarray]]:
+        """
+        Extract pose keypoints on the pose worker thread without blocking the event loop
         
-        return None
+        Args:
+            frame: Input frame (must not be modified until the result is available)
+            bboxes: Bounding boxes [[x1, y1, x2, y2], ...]
+            
+        Returns:
+            List with a (33, 3) keypoints array (or None if detection fails) per bounding box
+        """
+        future = self._pose_executor.submit(self._extract_poses_batch, frame, bboxes)
+        return await asyncio.wrap_future(future)
+    
+    def close(self):
+        """Stop the pose worker and release MediaPipe resources"""
+        self._pose_executor.shutdown(wait=True)
+        self.pose.close()
     
     def update_pose_history(self, track_id: int, keypoints: np.ndarray):
         """
@@ -94,16 +280,14 @@ class SuspiciousActivityDetector:
             track_id: Track identifier
             keypoints: Pose keypoints
         """
-        self.pose_history[track_id].append(keypoints)
-        
-        # Keep only recent history
-        max_history = 100
-        if len(self.pose_history[track_id]) > max_history:
-            self.pose_history[track_id] = self.pose_history[track_id][-max_history:]
+        buf = self.pose_history.get(track_id)
+        if buf is None or buf.data.shape[1:] != keypoints.shape:
+            buf = self.pose_history[track_id] = RingBuffer(self.max_history, keypoints.shape, np.float16)
+        buf.push(keypoints)
     
     def detect_fight_like_motion(self, keypoints_sequence: List[np.ndarray] = None,
                                  velocity_thresholds: float = None,
-                                 track_id: int = None) -> Dict:
+                                 track_id: int = None) -> SuspiciousResult:
         """
         Detect fight-like motion based on joint velocities
         
@@ -113,40 +297,37 @@ class SuspiciousActivityDetector:
             track_id: Track ID to analyze
             
         Returns:
-            Dictionary with detection results
+            SuspiciousResult with detection results
         """
         active_threshold = velocity_thresholds if velocity_thresholds is not None else self.velocity_threshold
         
         # Use provided sequence or stored history
-        if keypoints_sequence is None and track_id is not None:
-            keypoints_sequence = self.pose_history.get(track_id, [])
-        elif keypoints_sequence is None:
-            return {'is_suspicious': False, 'alert_triggered': False}
-        
-        if len(keypoints_sequence) < self.min_frames:
-            return {
-                'is_suspicious': False,
-                'track_id': track_id,
-                'frames_analyzed': len(keypoints_sequence),
-                'alert_triggered': False
-            }
-        
-        # Calculate joint velocities
-        velocities = self._calculate_joint_velocities(keypoints_sequence[-self.min_frames:])
-        
-        # Analyze for suspicious patterns
-        max_velocity = np.max(velocities) if len(velocities) > 0 else 0.0
-        mean_velocity = np.mean(velocities) if len(velocities) > 0 else 0.0
-
-        # Fraction of joint transitions exceeding threshold
-        frac_exceed = float(np.mean(velocities > active_threshold)) if len(velocities) > 0 else 0.0
+        if keypoints_sequence is not None:
+            num_frames = len(keypoints_sequence)
+        elif track_id is not None:
+            num_frames = len(self.pose_history[track_id]) if track_id in self.pose_history else 0
+        else:
+            return SuspiciousResult(is_suspicious=False)
         
-        # Check for specific joint movements (arms)
-        arm_indices = [11, 12, 13, 14, 15, 16]  # Shoulders, elbows, wrists
-        arm_velocities = self._calculate_specific_joint_velocities(
-            keypoints_sequence[-self.min_frames:], arm_indices
+        if num_frames < self.min_frames:
+            return SuspiciousResult(
+                is_suspicious=False,
+                track_id=track_id,
+                frames_analyzed=num_frames
+            )
+        
+        if keypoints_sequence is not None:
+            poses = np.asarray(keypoints_sequence[-self.min_frames:], dtype=np.float32)
+        else:
+            poses = self.pose_history[track_id].last(self.min_frames).astype(np.float32)
+        
+        # Joint velocity statistics in one fused pass: overall magnitude, fraction of
+        # joint transitions exceeding threshold, and arm (shoulders, elbows, wrists) motion
+        # (stored float16 history is widened to float32 before the kernel)
+        velocity_stats = _make_velocity_kernel(poses.shape[0], poses.shape[1], ARM_JOINTS)
+        max_velocity, mean_velocity, frac_exceed, arm_velocity = velocity_stats(
+            np.ascontiguousarray(poses), float(active_threshold)
         )
-        arm_velocity = float(np.mean(arm_velocities)) if len(arm_velocities) > 0 else 0.0
 
         # Stricter detection combining magnitude and spread across joints
         # Require both high max and sufficient fraction of joints exceeding threshold
@@ -157,92 +338,29 @@ class SuspiciousActivityDetector:
         # Track alerts
         alert_triggered = False
         if track_id is not None:
-            if is_suspicious and track_id not in self.suspicious_tracks:
+            if is_suspicious and track_id not in self._suspicious:
                 alert_triggered = True
-                self.suspicious_tracks.add(track_id)
+                self._suspicious.add(track_id)
                 logger.warning(f"Suspicious activity detected for track {track_id}: max_vel={max_velocity:.2f}, arm_vel={arm_velocity:.2f}")
-            elif not is_suspicious and track_id in self.suspicious_tracks:
-                self.suspicious_tracks.remove(track_id)
-        
-        return {
-            'is_suspicious': is_suspicious,
-            'track_id': track_id,
-            'max_velocity': float(max_velocity),
-            'mean_velocity': float(mean_velocity),
-            'arm_velocity': float(arm_velocity),
-            'frac_exceed': float(frac_exceed),
-            'frames_analyzed': len(keypoints_sequence),
-            'alert_triggered': alert_triggered,
-            'activity_type': 'fight_like' if is_suspicious else 'normal'
-        }
-    
-    @staticmethod
-    def _calculate_joint_velocities(keypoints_sequence: List[np.ndarray]) -> np.ndarray:
-        """
-        Calculate velocities of all joints
-        
-        Args:
-            keypoints_sequence: List of keypoint arrays
-            
-        Returns:
-            Array of velocities
-        """
-        if len(keypoints_sequence) < 2:
-            return np.array([])
-        
-        velocities = []
-        
-        for i in range(1, len(keypoints_sequence)):
-            prev_kp = keypoints_sequence[i - 1]
-            curr_kp = keypoints_sequence[i]
-            
-            # Calculate Euclidean distance for each joint
-            diff = curr_kp[:, :2] - prev_kp[:, :2]  # Only x, y coordinates
-            dist = np.linalg.norm(diff, axis=1)
-            
-            # Weight by visibility
-            visibility = (prev_kp[:, 2] + curr_kp[:, 2]) / 2.0
-            weighted_dist = dist * visibility
-            
-            velocities.extend(weighted_dist)
-        
-        return np.array(velocities)
-    
-    @staticmethod
-    def _calculate_specific_joint_velocities(keypoints_sequence: List[np.ndarray],
-                                            joint_indices: List[int]) -> np.ndarray:
-        """
-        Calculate velocities for specific joints
-        
-        Args:
-            keypoints_sequence: List of keypoint arrays
-            joint_indices: Indices of joints to analyze
-            
-        Returns:
-            Array of velocities for specified joints
-        """
-        if len(keypoints_sequence) < 2:
-            return np.array([])
-        
-        velocities = []
+            elif not is_suspicious and track_id in self._suspicious:
+                self._suspicious.discard(track_id)
         
-        for i in range(1, len(keypoints_sequence)):
-            prev_kp = keypoints_sequence[i - 1]
-            curr_kp = keypoints_sequence[i]
-            
-            for joint_idx in joint_indices:
-                if joint_idx < len(prev_kp):
-                    diff = curr_kp[joint_idx, :2] - prev_kp[joint_idx, :2]
-                    dist = np.linalg.norm(diff)
-                    visibility = (prev_kp[joint_idx, 2] + curr_kp[joint_idx, 2]) / 2.0
-                    velocities.append(dist * visibility)
-        
-        return np.array(velocities)
+        return SuspiciousResult(
+            is_suspicious=bool(is_suspicious),
+            alert_triggered=alert_triggered,
+            track_id=track_id,
+            max_velocity=float(max_velocity),
+            mean_velocity=float(mean_velocity),
+            arm_velocity=float(arm_velocity),
+            frac_exceed=float(frac_exceed),
+            frames_analyzed=num_frames,
+            activity_type='fight_like' if is_suspicious else 'normal'
+        )
     
     def cleanup_old_tracks(self, active_track_ids: List[int]):
         """Remove history for inactive tracks"""
-        all_track_ids = list(self.pose_history.keys())
-        for track_id in all_track_ids:
-            if track_id not in active_track_ids:
+        active = set(active_track_ids)
+        for track_id in list(self.pose_history.keys()):
+            if track_id not in active:
                 del self.pose_history[track_id]
-                self.suspicious_tracks.discard(track_id)
+                self._suspicious.discard(track_id)
@@ -3,12 +3,74 @@ Zone Violation Detection Module
 Detects when people enter restricted zones
 """
 import numpy as np
-from typing import List, Tuple, Dict
-from shapely.geometry import Point, Polygon
+import threading
+from dataclasses import replace
+from typing import TYPE_CHECKING, List, Optional, Sequence, Set, Tuple
 import logging
 
+from ._bitset import TrackFlags
+from ._types import ZoneViolationResult
+
+if TYPE_CHECKING:
+    from shapely.geometry import Point, Polygon
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; fall back to Shapely
+    njit = None
+    prange = range
+
 logger = logging.getLogger(__name__)
 
+# Zone count above which the Shapely path queries an STR-tree instead of bounding boxes
+RTREE_MIN_ZONES = 16
+
+
+def _contains_kernel(px, py, vx, vy, starts, counts, bbox_min, bbox_max):
+    """
+    Ray-casting point-in-polygon test of K points against Z packed polygons
+    
+    Args:
+        px, py: Point coordinates, shape (K,)
+        vx, vy: Vertex coordinates of all polygons concatenated
+        starts: Offset of each polygon's first vertex, shape (Z,)
+        counts: Number of vertices of each polygon, shape (Z,)
+        bbox_min, bbox_max: Per-polygon bounding boxes, shape (Z, 2)
+        
+    Returns:
+        (K, Z) uint8 mask, 1 where the point is inside the polygon
+    """
+    num_points = px.shape[0]
+    num_zones = starts.shape[0]
+    mask = np.zeros((num_points, num_zones), dtype=np.uint8)
+    for k in prange(num_points):
+        x = px[k]
+        y = py[k]
+        for z in range(num_zones):
+            # Cheap bounding-box rejection before the exact test
+            if x < bbox_min[z, 0] or x > bbox_max[z, 0] or y < bbox_min[z, 1] or y > bbox_max[z, 1]:
+                continue
+            start = starts[z]
+            n = counts[z]
+            inside = False
+            p1x = vx[start]
+            p1y = vy[start]
+            for i in range(1, n + 1):
+                p2x = vx[start + i % n]
+                p2y = vy[start + i % n]
+                if y > min(p1y, p2y) and y <= max(p1y, p2y) and x <= max(p1x, p2x):
+                    # p1y != p2y is implied by the y-range test above
+                    if p1x == p2x or x <= (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x:
+                        inside = not inside
+                p1x = p2x
+                p1y = p2y
+            mask[k, z] = inside
+    return mask
+
+
+if njit is not None:
+    _contains_kernel = njit(parallel=True, cache=True, nogil=True)(_contains_kernel)
+
 
 class ZoneViolationDetector:
     """Detects violations of restricted zones"""
@@ -23,11 +85,27 @@ class ZoneViolationDetector:
         self.restricted_zones = []
         self.zone_polygons = []
         
+        # Guards zone edits against batches running on a worker thread
+        self._lock = threading.RLock()
+        
+        # Packed (SoA) zone vertices for the ray-casting kernel, see _compile_zones
+        self._use_numba = njit is not None
+        self._compile_zones()
+        if self._use_numba:
+            # Warm up the kernel so JIT compilation doesn't stall the first frame
+            _contains_kernel(np.zeros(1), np.zeros(1), self._vx, self._vy, self._starts, self._counts,
+                             self._bbox_min, self._bbox_max)
+        
         if restricted_zones:
             for zone in restricted_zones:
                 self.add_zone(zone)
         
-        self.violating_tracks = set()
+        self._violating = TrackFlags()  # tracks currently inside a zone
+    
+    @property
+    def violating_tracks(self) -> Set[int]:
+        """IDs of tracks currently inside a restricted zone"""
+        return self._violating.to_set()
     
     def add_zone(self, zone_points: List[Tuple[float, float]]):
         """
@@ -40,26 +118,103 @@ class ZoneViolationDetector:
             logger.warning("Zone must have at least 3 points")
             return
         
-        self.restricted_zones.append(zone_points)
-        self.zone_polygons.append(Polygon(zone_points))
+        import shapely
+        from shapely.geometry import Polygon
+        
+        polygon = Polygon(zone_points)
+        # Build the GEOS spatial index once so containment queries don't rebuild it per call
+        shapely.prepare(polygon)
+        
+        with self._lock:
+            self.restricted_zones.append(zone_points)
+            self.zone_polygons.append(polygon)
+            self._compile_zones()
         logger.info(f"Added restricted zone with {len(zone_points)} points")
     
     def remove_zone(self, zone_index: int):
         """Remove a zone by index"""
-        if 0 <= zone_index < len(self.restricted_zones):
+        with self._lock:
+            if not 0 <= zone_index < len(self.restricted_zones):
+                return
             self.restricted_zones.pop(zone_index)
             self.zone_polygons.pop(zone_index)
-            logger.info(f"Removed zone at index {zone_index}")
+            self._compile_zones()
+        logger.info(f"Removed zone at index {zone_index}")
+    
+    def set_zones(self, zones: Sequence[Sequence[Tuple[float, float]]]):
+        """
+        Replace all zones at once (compiled once, never observed half-updated)
+        
+        Args:
+            zones: Polygon zones, each a sequence or (K, 2) array of (x, y) points
+        """
+        import shapely
+        from shapely.geometry import Polygon
+        
+        restricted_zones, polygons = [], []
+        for zone in zones:
+            points = np.asarray(zone, dtype=np.float64).reshape(-1, 2)
+            if len(points) < 3:
+                logger.warning("Zone must have at least 3 points")
+                continue
+            polygon = Polygon(points)
+            shapely.prepare(polygon)
+            restricted_zones.append([tuple(point) for point in points.tolist()])
+            polygons.append(polygon)
+        
+        with self._lock:
+            self.restricted_zones = restricted_zones
+            self.zone_polygons = polygons
+            self._violating.clear()
+            self._compile_zones()
+        logger.info(f"Set {len(restricted_zones)} restricted zones")
     
     def clear_zones(self):
         """Clear all zones"""
-        self.restricted_zones = []
-        self.zone_polygons = []
-        self.violating_tracks = set()
+        with self._lock:
+            self.restricted_zones = []
+            self.zone_polygons = []
+            self._violating.clear()
+            self._compile_zones()
         logger.info("Cleared all restricted zones")
     
+    def _compile_zones(self):
+        """
+        Pack all zone vertices into flat arrays for the ray-casting kernel and
+        precompute per-zone bounding boxes, convex half-planes (plus an STR-tree
+        for large zone sets)
+        """
+        counts = [len(zone) for zone in self.restricted_zones]
+        vertices = np.array([point for zone in self.restricted_zones for point in zone],
+                            dtype=np.float32).reshape(-1, 2)
+        
+        self._vx = np.ascontiguousarray(vertices[:, 0])
+        self._vy = np.ascontiguousarray(vertices[:, 1])
+        self._counts = np.array(counts, dtype=np.int64)
+        self._starts = np.cumsum(self._counts) - self._counts
+        
+        if len(counts):
+            self._bbox_min = np.minimum.reduceat(vertices, self._starts, axis=0)
+            self._bbox_max = np.maximum.reduceat(vertices, self._starts, axis=0)
+        else:
+            self._bbox_min = np.empty((0, 2), dtype=np.float32)
+            self._bbox_max = np.empty((0, 2), dtype=np.float32)
+        # Convex zones get a vectorized half-plane test on the NumPy path: per zone, the
+        # non-degenerate edges and the orientation sign (+1 counter-clockwise)
+        self._convex_edges = [self._convex_half_planes(np.asarray(zone, dtype=np.float64))
+                              for zone in self.restricted_zones]
+        self._rtree = None
+        if len(self.zone_polygons) > RTREE_MIN_ZONES:
+            from shapely.strtree import STRtree
+            self._rtree = STRtree(self.zone_polygons)
+        
+        # Containment mask of the last batch, reused while the points don't move (see
+        # detect_zone_violations_batch); zones changed, so drop it
+        self._last_points = None
+        self._last_inside = None
+    
     def detect_zone_violation(self, center_point: Tuple[float, float], 
-                             zone_polygons: List = None, track_id: int = None) -> Dict:
+                             zone_polygons: List = None, track_id: int = None) -> ZoneViolationResult:
         """
         Detect if a point violates any restricted zone
         
@@ -69,17 +224,18 @@ class ZoneViolationDetector:
             track_id: Optional track ID for alert tracking
             
         Returns:
-            Dictionary with violation results
+            ZoneViolationResult with violation results
         """
         if zone_polygons is None:
-            zone_polygons = self.zone_polygons
+            result = self.detect_zone_violations_batch([center_point], [track_id])[0]
+            if result.point is not None:
+                result = replace(result, point=center_point)
+            return result
         
         if not zone_polygons:
-            return {
-                'is_violation': False,
-                'violated_zones': [],
-                'alert_triggered': False
-            }
+            return ZoneViolationResult(is_violation=False)
+        
+        from shapely.geometry import Point
         
         point = Point(center_point[0], center_point[1])
         violated_zones = []
@@ -93,23 +249,167 @@ class ZoneViolationDetector:
         # Track alerts per track ID
         alert_triggered = False
         if track_id is not None:
-            if is_violation and track_id not in self.violating_tracks:
+            if is_violation and track_id not in self._violating:
                 alert_triggered = True
-                self.violating_tracks.add(track_id)
+                self._violating.add(track_id)
                 logger.warning(f"Zone violation detected for track {track_id} at {center_point}")
-            elif not is_violation and track_id in self.violating_tracks:
-                self.violating_tracks.remove(track_id)
+            elif not is_violation and track_id in self._violating:
+                self._violating.discard(track_id)
+        
+        return ZoneViolationResult(
+            is_violation=is_violation,
+            violated_zones=tuple(violated_zones),
+            point=center_point,
+            alert_triggered=alert_triggered,
+            track_id=track_id
+        )
+    
+    def detect_zone_violations_batch(self, centers: Sequence[Tuple[float, float]],
+                                     track_ids: Optional[Sequence[int]] = None) -> List[ZoneViolationResult]:
+        """
+        Detect zone violations for many points at once
+        
+        Args:
+            centers: (K, 2) array-like of (x, y) coordinates to check
+            track_ids: Optional track IDs (one per point, None entries are not alert-tracked)
+            
+        Returns:
+            List of violation results, one per point
+        """
+        with self._lock:
+            return self._detect_batch(centers, track_ids)
+    
+    def _detect_batch(self, centers: Sequence[Tuple[float, float]],
+                      track_ids: Optional[Sequence[int]]) -> List[ZoneViolationResult]:
+        """detect_zone_violations_batch body, called with the zone lock held"""
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        if track_ids is None:
+            track_ids = [None] * len(centers)
+        
+        if not self.zone_polygons:
+            return [ZoneViolationResult(is_violation=False)] * len(centers)
+        
+        # (K, Z) containment mask in a single call, skipped when every point is within
+        # the same whole pixel as in the previous batch (static scenes)
+        xs, ys = centers[:, 0], centers[:, 1]
+        points = np.rint(centers)
+        if self._last_points is not None and np.array_equal(points, self._last_points):
+            inside = self._last_inside
+        else:
+            inside = self._contains(xs, ys)
+            self._last_points = points
+            self._last_inside = inside
+        is_violation = inside.any(axis=1)
+        
+        # Alert on state changes per track ID
+        tracked = np.array([tid is not None for tid in track_ids], dtype=bool)
+        newly_violating = np.zeros(len(track_ids), dtype=bool)
+        newly_violating[tracked], _ = self._violating.update(
+            [tid for tid in track_ids if tid is not None], is_violation[tracked]
+        )
+        
+        results = []
+        for k, track_id in enumerate(track_ids):
+            point = (float(xs[k]), float(ys[k]))
+            alert_triggered = bool(newly_violating[k])
+            if alert_triggered:
+                logger.warning(f"Zone violation detected for track {track_id} at {point}")
+            results.append(ZoneViolationResult(
+                is_violation=bool(is_violation[k]),
+                violated_zones=tuple(np.flatnonzero(inside[k]).tolist()),
+                point=point,
+                alert_triggered=alert_triggered,
+                track_id=track_id
+            ))
+        
+        return results
+    
+    def batch_contains(self, points: Sequence[Tuple[float, float]]) -> np.ndarray:
+        """
+        Test many points against every zone at once
+        
+        Args:
+            points: (K, 2) array-like of (x, y) coordinates
+            
+        Returns:
+            (K, Z) boolean mask, True where the point is inside the zone
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        with self._lock:
+            return self._contains(points[:, 0], points[:, 1])
+    
+    def _contains(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """(K, Z) containment mask with the fastest available backend, called with the zone lock held"""
+        if self._use_numba:
+            return _contains_kernel(xs, ys, self._vx, self._vy, self._starts, self._counts,
+                                    self._bbox_min, self._bbox_max).astype(bool)
+        return self._contains_shapely(xs, ys)
+    
+    @staticmethod
+    def _convex_half_planes(vertices: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray, float]]:
+        """
+        Edges of a convex polygon for the half-plane containment test
+        
+        Args:
+            vertices: (N, 2) polygon vertices
+            
+        Returns:
+            (edge start points, edge vectors, orientation sign), or None if not convex
+        """
+        edges = np.roll(vertices, -1, axis=0) - vertices
+        keep = (edges != 0).any(axis=1)
+        starts, edges = vertices[keep], edges[keep]
+        if len(edges) < 3:
+            return None
+        # Convex when consecutive edges all turn the same way (collinear turns allowed)
+        following = np.roll(edges, -1, axis=0)
+        turns = edges[:, 0] * following[:, 1] - edges[:, 1] * following[:, 0]
+        if not ((turns >= 0).all() or (turns <= 0).all()) or not turns.any():
+            return None
+        # ... and wind exactly once: a pentagram turns one way too, but through 4*pi
+        sign = 1.0 if turns.sum() > 0 else -1.0
+        dots = edges[:, 0] * following[:, 0] + edges[:, 1] * following[:, 1]
+        if not np.isclose(np.arctan2(turns, dots).sum(), 2 * np.pi * sign):
+            return None
+        return starts, edges, sign
+    
+    def _contains_shapely(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        (K, Z) containment mask using Shapely, testing only bounding-box candidates;
+        convex zones use a vectorized half-plane test instead
         
-        return {
-            'is_violation': is_violation,
-            'violated_zones': violated_zones,
-            'point': center_point,
-            'alert_triggered': alert_triggered,
-            'track_id': track_id
-        }
+        Args:
+            xs: X coordinates, shape (K,)
+            ys: Y coordinates, shape (K,)
+            
+        Returns:
+            (K, Z) boolean mask
+        """
+        import shapely
+        
+        inside = np.zeros((len(xs), len(self.zone_polygons)), dtype=bool)
+        if self._rtree is not None:
+            point_idx, zone_idx = self._rtree.query(shapely.points(xs, ys), predicate='within')
+            inside[point_idx, zone_idx] = True
+            return inside
+        
+        pts = np.column_stack((xs, ys))
+        candidates = ((pts[:, None, :] >= self._bbox_min) & (pts[:, None, :] <= self._bbox_max)).all(axis=2)
+        for z in np.flatnonzero(candidates.any(axis=0)):
+            k = np.flatnonzero(candidates[:, z])
+            convex = self._convex_edges[z]
+            if convex is None:
+                inside[k, z] = shapely.contains_xy(self.zone_polygons[z], xs[k], ys[k])
+                continue
+            # Strictly left of every counter-clockwise edge (boundary excluded, as in Shapely)
+            starts, edges, sign = convex
+            dx = xs[k, None] - starts[:, 0]
+            dy = ys[k, None] - starts[:, 1]
+            inside[k, z] = (sign * (edges[:, 0] * dy - edges[:, 1] * dx) > 0).all(axis=1)
+        return inside
     
     @staticmethod
-    def _point_in_polygon(point: Point, polygon: Polygon) -> bool:
+    def _point_in_polygon(point: 'Point', polygon: 'Polygon') -> bool:
         """
         Check if point is inside polygon using Shapely
         
@@ -126,32 +426,29 @@ class ZoneViolationDetector:
     def point_in_polygon_manual(point: Tuple[float, float], 
                                polygon: List[Tuple[float, float]]) -> bool:
         """
-        Check if point is inside polygon using ray casting algorithm
+        Check if point is inside polygon using ray casting algorithm (vectorized over edges)
         
         Args:
             point: (x, y) coordinates
-            polygon: List of (x, y) vertices
+            polygon: List or (N, 2) array of (x, y) vertices
             
         Returns:
             True if point is inside polygon
         """
         x, y = point
-        n = len(polygon)
-        inside = False
-        
-        p1x, p1y = polygon[0]
-        for i in range(1, n + 1):
-            p2x, p2y = polygon[i % n]
-            if y > min(p1y, p2y):
-                if y <= max(p1y, p2y):
-                    if x <= max(p1x, p2x):
-                        if p1y != p2y:
-                            xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
-                        if p1x == p2x or x <= xinters:
-                            inside = not inside
-            p1x, p1y = p2x, p2y
+        p1 = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+        p2 = np.roll(p1, -1, axis=0)
+        p1x, p1y, p2x, p2y = p1[:, 0], p1[:, 1], p2[:, 0], p2[:, 1]
         
-        return inside
+        # Edges whose y-span contains the ray (horizontal edges never do) and that
+        # reach right of the point
+        spans = (y > np.minimum(p1y, p2y)) & (y <= np.maximum(p1y, p2y)) & (x <= np.maximum(p1x, p2x))
+        dy = p2y - p1y
+        xinters = np.divide((y - p1y) * (p2x - p1x), dy, out=np.zeros_like(dy), where=dy != 0) + p1x
+        crossings = spans & ((p1x == p2x) | (x <= xinters))
+        
+        # Inside when the ray crosses an odd number of edges
+        return bool(np.count_nonzero(crossings) & 1)
     
     def get_zones(self) -> List[List[Tuple[float, float]]]:
         """Get all defined zones"""
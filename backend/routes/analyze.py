@@ -3,14 +3,20 @@ Video Analysis Route
 POST endpoint for uploading and analyzing videos
 """
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, Union
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 import numpy as np
+from scipy.spatial import cKDTree
 import tempfile
+import io
 import os
-import base64
+import shutil
+import binascii
+import asyncio
 import logging
 from datetime import datetime
 
@@ -18,6 +24,38 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# PyTurboJPEG calls libjpeg-turbo's SIMD encoder directly; load the shared library once
+try:
+    from turbojpeg import TurboJPEG, TJSAMP_420
+    _tj = TurboJPEG()
+except (ImportError, OSError, RuntimeError):  # not installed or libturbojpeg missing
+    _tj = None
+
+# Without libjpeg-turbo, CUDA hosts encode on the GPU with nvJPEG (torchvision >= 0.19 is the
+# first to accept CUDA tensors). Resolved on the first encode so importing this module never
+# pulls in torch: None until then, False when unavailable or once a GPU encode has failed
+_nvjpeg = None
+_torch = None
+_encode_jpeg_tensor = None
+
+# OpenCV >= 4.11 can decode from a Python file object (FFmpeg backend); uploads up to
+# this size are then kept in memory instead of being written out for VideoCapture
+_STREAM_CAPTURE = hasattr(cv2, 'IStreamReader')
+_IN_MEMORY_MAX_BYTES = 200 * 1024 * 1024
+
+# Memory-backed filesystem for larger uploaded videos, so OpenCV re-reads them without disk I/O
+_SHM_DIR = '/dev/shm'
+_SHM_HEADROOM = 64 * 1024 * 1024  # bytes left free for other users of /dev/shm
+
+_DATA_URL_PREFIX = b"data:image/jpeg;base64,"
+
+# Frames are decoded and run through YOLO here, one window ahead of tracking and analytics;
+# a single worker keeps GPU batches in order
+_detect_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="detect")
+
+# Event snapshots are JPEG-encoded here so encoding overlaps with detection of later frames
+_snapshot_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="snapshot")
+
 
 class AnalysisConfig(BaseModel):
     """Configuration for video analysis"""
@@ -26,6 +64,8 @@ class AnalysisConfig(BaseModel):
     loitering_distance: float = 50.0  # pixels
     velocity_threshold: float = 15.0
     restricted_zones: List[List[List[float]]] = []
+    batch_size: int = 16  # frames per detector call
+    detect_stride: int = 2  # run the detector on every Nth frame, reuse its detections in between
 
 
 class EventModel(BaseModel):
@@ -43,26 +83,28 @@ class AnalysisResult(BaseModel):
     total_frames: int
     events: List[EventModel]
     summary: Dict
-def _to_py(obj):
-    """Recursively convert numpy types to native Python types for JSON serialization."""
-    if isinstance(obj, dict):
-        return {k: _to_py(v) for k, v in obj.items()}
-    if isinstance(obj, (list, tuple)):
-        return [
-            _to_py(x) for x in obj
-        ]
-    # Scalars
-    if isinstance(obj, (np.bool_,)):
-        return bool(obj)
-    if isinstance(obj, (np.integer,)):
-        return int(obj)
-    if isinstance(obj, (np.floating,)):
-        return float(obj)
-    return obj
-
-
-
-@router.post("/upload", response_model=AnalysisResult)
+
+
+def _upload_dir(size: Optional[int]) -> Optional[str]:
+    """
+    Pick the directory for the temporary copy of an upload
+    
+    Args:
+        size: Upload size in bytes, if known
+        
+    Returns:
+        /dev/shm if the upload fits in it, else None (the default temp directory)
+    """
+    if size is None or not os.path.isdir(_SHM_DIR):
+        return None
+    try:
+        free = shutil.disk_usage(_SHM_DIR).free
+    except OSError:
+        return None
+    return _SHM_DIR if size + _SHM_HEADROOM <= free else None
+
+
+@router.post("/upload", response_model=AnalysisResult, response_class=ORJSONResponse)
 async def analyze_video(
     video: UploadFile = File(...),
     config: str = Form(default='{}')
@@ -77,32 +119,40 @@ async def analyze_video(
     Returns:
         Analysis results with detected events
     """
-    import json
     # Reuse global components from main to avoid re-loading heavy models each request
     from main import app_state
     from models.detector import PersonDetector
     
-    # Parse configuration
+    # Parse configuration (pydantic parses and validates the JSON in one pass)
     try:
-        config_dict = json.loads(config)
-        analysis_config = AnalysisConfig(**config_dict)
+        analysis_config = AnalysisConfig.model_validate_json(config)
     except Exception as e:
         logger.warning(f"Invalid config, using defaults: {e}")
         analysis_config = AnalysisConfig()
     
-    # Save uploaded file temporarily (streamed to avoid large memory usage)
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp4')
+    # Small uploads are decoded straight from memory when OpenCV supports stream input;
+    # others are saved temporarily (streamed to avoid large memory usage)
+    in_memory = _STREAM_CAPTURE and video.size is not None and video.size <= _IN_MEMORY_MAX_BYTES
+    cap = None
+    pending = None  # in-flight read + detection of the next window of frames
+    temp_file = None if in_memory else tempfile.NamedTemporaryFile(
+        delete=False, suffix='.mp4', dir=_upload_dir(video.size)
+    )
     try:
-        size = 0
-        chunk_size = 1024 * 1024  # 1MB
-        while True:
-            chunk = await video.read(chunk_size)
-            if not chunk:
-                break
-            temp_file.write(chunk)
-            size += len(chunk)
-        temp_file.flush()
-        temp_file.close()
+        if in_memory:
+            data = await video.read()
+            size = len(data)
+        else:
+            size = 0
+            chunk_size = 1024 * 1024  # 1MB
+            while True:
+                chunk = await video.read(chunk_size)
+                if not chunk:
+                    break
+                temp_file.write(chunk)
+                size += len(chunk)
+            temp_file.flush()
+            temp_file.close()
         if size < 1024:
             raise HTTPException(status_code=400, detail="Uploaded file is empty or too small to be a valid video.")
 
@@ -121,14 +171,19 @@ async def analyze_video(
         zone_violation = app_state['zone_violation']
         suspicious = app_state['suspicious']
         suspicious.velocity_threshold = analysis_config.velocity_threshold
+        pool = app_state['pool']
+        loop = asyncio.get_running_loop()
 
         # Replace zones with provided restricted zones
-        zone_violation.clear_zones()
-        for zone in analysis_config.restricted_zones:
-            zone_violation.add_zone([tuple(point) for point in zone])
+        zone_violation.set_zones(analysis_config.restricted_zones)
         
         # Process video
-        cap = cv2.VideoCapture(temp_file.name)
+        if in_memory:
+            # VideoCapture does not keep the stream alive; hold it until cap.release()
+            stream = io.BytesIO(data)
+            cap = cv2.VideoCapture(stream, cv2.CAP_FFMPEG, [])
+        else:
+            cap = cv2.VideoCapture(temp_file.name)
         if not cap.isOpened():
             raise HTTPException(status_code=400, detail="Failed to open video. Unsupported codec or corrupted file.")
         fps = int(cap.get(cv2.CAP_PROP_FPS)) or 30
@@ -137,123 +192,167 @@ async def analyze_video(
             raise HTTPException(status_code=400, detail="Video contains 0 frames. Possibly corrupted or unsupported format.")
         
         events = []
+        snapshots = []  # pending snapshot encodings, one per event
         frame_num = 0
+        batch_size = max(1, analysis_config.batch_size)
+        stride = max(1, analysis_config.detect_stride)
+        detections = np.empty((0, 5))  # last detector output, reused on skipped frames
+        # cap.read decodes into these arrays in place once they exist, so frames are not
+        # reallocated per read; snapshots therefore encode a copy of the frame (or region).
+        # Two sets alternate: the next window is decoded into one while the other is analyzed
+        frame_bufs = [[None] * batch_size, [None] * batch_size]
+        frame_snapshots = {}  # this frame's pending snapshots: track ID (None for the full frame) -> encoding
+        
+        def queue_snapshot(frame: np.ndarray, track: Optional[Dict] = None):
+            """Queue the snapshot of an event, encoding each frame or track region at most once"""
+            key = None if track is None else track['id']
+            if key not in frame_snapshots:
+                image = frame if track is None else _crop_roi(frame, track['bbox'])
+                frame_snapshots[key] = loop.run_in_executor(_snapshot_executor, _encode_frame, image.copy())
+            snapshots.append(frame_snapshots[key])
+        
+        def load_batch(bufs: List[Optional[np.ndarray]], first_frame: int):
+            """Read the next window of frames and detect people in every stride-th one with one model call"""
+            frames = []
+            while len(frames) < batch_size:
+                ret, frame = cap.read(bufs[len(frames)])
+                if not ret:
+                    break
+                bufs[len(frames)] = frame
+                frames.append(frame)
+            
+            keyframes = [i for i in range(len(frames)) if (first_frame + i) % stride == 0]
+            return frames, dict(zip(keyframes, detector.detect_people_array_batch([frames[i] for i in keyframes])))
         
         logger.info(f"Processing video: {total_frames} frames @ {fps}fps")
         
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
+        pending = loop.run_in_executor(_detect_executor, load_batch, frame_bufs[0], 0)
+        num_batches = 0
+        while True:
+            frames, batch_detections = await pending
+            if not frames:
                 break
+            num_batches += 1
             
-            frame_num += 1
-            
-            # Detect people
-            detections = detector.detect_people(frame)
-            detection_list = [[*bbox, conf] for bbox, conf, _ in detections]
+            # Decode and detect the next window while tracking and analytics run on this one
+            pending = loop.run_in_executor(_detect_executor, load_batch, frame_bufs[num_batches % 2],
+                                           frame_num + len(frames))
             
-            # Track people
-            tracks = tracker.update(detection_list, frame)
-            
-            # Count people
-            count = len(tracks)
-            
-            # Check overcrowding
-            overcrowd_result = overcrowding.detect_overcrowding(count)
-            if overcrowd_result['alert_triggered']:
-                event = EventModel(
-                    event_type="overcrowding",
-                    timestamp=datetime.now().isoformat(),
-                    frame_number=frame_num,
-                    details=_to_py(overcrowd_result),
-                    snapshot=_encode_frame(frame)
-                )
-                events.append(event)
-            
-            # Process each track
-            active_track_ids = []
-            for track in tracks:
-                track_id = track['id']
-                bbox = track['bbox']
-                active_track_ids.append(track_id)
+            for i, frame in enumerate(frames):
+                frame_num += 1
+                detections = batch_detections.get(i, detections)
+                frame_ts = None  # shared by all events of this frame, formatted on first use
+                frame_snapshots.clear()
                 
-                # Calculate center point
-                center_x = (bbox[0] + bbox[2]) / 2
-                center_y = (bbox[1] + bbox[3]) / 2
-                center = (center_x, center_y)
+                # Track people
+                tracks = tracker.update(detections, frame)
                 
-                # Update loitering history
-                loitering.update_track(track_id, center, frame_num)
+                # Count people
+                count = len(tracks)
                 
-                # Check loitering
-                loiter_result = loitering.detect_loitering(track_id)
-                if loiter_result['alert_triggered']:
+                # Check overcrowding
+                overcrowd_result = overcrowding.detect_overcrowding(count)
+                if overcrowd_result['alert_triggered']:
+                    frame_ts = frame_ts or datetime.now().isoformat()
                     event = EventModel(
-                        event_type="loitering",
-                        timestamp=datetime.now().isoformat(),
+                        event_type="overcrowding",
+                        timestamp=frame_ts,
                         frame_number=frame_num,
-                        details=_to_py(loiter_result),
-                        snapshot=_encode_frame(frame)
+                        details=overcrowd_result.to_dict()
                     )
                     events.append(event)
+                    queue_snapshot(frame)
                 
-                # Check zone violation
-                zone_result = zone_violation.detect_zone_violation(center, track_id=track_id)
-                if zone_result['alert_triggered']:
-                    event = EventModel(
-                        event_type="zone_violation",
-                        timestamp=datetime.now().isoformat(),
-                        frame_number=frame_num,
-                        details=_to_py(zone_result),
-                        snapshot=_encode_frame(frame)
-                    )
-                    events.append(event)
+                # Calculate center points
+                active_track_ids = [track['id'] for track in tracks]
+                centers = _track_centers(tracks)
+                
+                # Check loitering and zone violations and extract poses for all tracks at once,
+                # running the three independent detectors concurrently
+                loiter_results, zone_results, poses = await asyncio.gather(
+                    loop.run_in_executor(pool, loitering.update_tracks_and_detect, active_track_ids, centers, frame_num),
+                    loop.run_in_executor(pool, zone_violation.detect_zone_violations_batch, centers, active_track_ids),
+                    suspicious.extract_poses_async(frame, [track['bbox'] for track in tracks])
+                )
                 
-                # Extract pose and check suspicious activity
-                pose_keypoints = suspicious.extract_pose(frame, bbox)
-                if pose_keypoints is not None:
-                    suspicious.update_pose_history(track_id, pose_keypoints)
+                # Process each track
+                for track, loiter_result, zone_result, pose_keypoints in zip(tracks, loiter_results, zone_results, poses):
+                    track_id = track['id']
                     
-                    # Check for suspicious activity
-                    if frame_num % 10 == 0:  # Check every 10 frames
-                        activity_result = suspicious.detect_fight_like_motion(track_id=track_id)
-                        if activity_result['alert_triggered']:
-                            event = EventModel(
-                                event_type="suspicious_activity",
-                                timestamp=datetime.now().isoformat(),
-                                frame_number=frame_num,
-                                details=_to_py(activity_result),
-                                snapshot=_encode_frame(frame)
-                            )
-                            events.append(event)
-            
-            # Cleanup old tracks
-            loitering.cleanup_old_tracks(active_track_ids)
-            suspicious.cleanup_old_tracks(active_track_ids)
+                    # Check loitering
+                    if loiter_result['alert_triggered']:
+                        frame_ts = frame_ts or datetime.now().isoformat()
+                        event = EventModel(
+                            event_type="loitering",
+                            timestamp=frame_ts,
+                            frame_number=frame_num,
+                            details=loiter_result.to_dict()
+                        )
+                        events.append(event)
+                        queue_snapshot(frame, track)
+                    
+                    # Check zone violation
+                    if zone_result['alert_triggered']:
+                        frame_ts = frame_ts or datetime.now().isoformat()
+                        event = EventModel(
+                            event_type="zone_violation",
+                            timestamp=frame_ts,
+                            frame_number=frame_num,
+                            details=zone_result.to_dict()
+                        )
+                        events.append(event)
+                        queue_snapshot(frame, track)
+                    
+                    # Check suspicious activity
+                    if pose_keypoints is not None:
+                        suspicious.update_pose_history(track_id, pose_keypoints)
+                        
+                        # Check for suspicious activity
+                        if frame_num % 10 == 0:  # Check every 10 frames
+                            activity_result = suspicious.detect_fight_like_motion(track_id=track_id)
+                            if activity_result['alert_triggered']:
+                                frame_ts = frame_ts or datetime.now().isoformat()
+                                event = EventModel(
+                                    event_type="suspicious_activity",
+                                    timestamp=frame_ts,
+                                    frame_number=frame_num,
+                                    details=activity_result.to_dict()
+                                )
+                                events.append(event)
+                                queue_snapshot(frame, track)
+                
+                # Cleanup old tracks
+                loitering.cleanup_old_tracks(active_track_ids)
+                suspicious.cleanup_old_tracks(active_track_ids)
         
         cap.release()
         
+        # Attach the snapshots encoded in the background
+        for event, snapshot in zip(events, await asyncio.gather(*snapshots)):
+            event.snapshot = snapshot
+        
         # Generate summary
+        event_counts = Counter(e.event_type for e in events)
         summary = {
             'total_frames': total_frames,
             'fps': fps,
             'total_events': len(events),
             'event_breakdown': {
-                'overcrowding': sum(1 for e in events if e.event_type == 'overcrowding'),
-                'loitering': sum(1 for e in events if e.event_type == 'loitering'),
-                'zone_violation': sum(1 for e in events if e.event_type == 'zone_violation'),
-                'suspicious_activity': sum(1 for e in events if e.event_type == 'suspicious_activity')
+                event_type: event_counts[event_type]
+                for event_type in ('overcrowding', 'loitering', 'zone_violation', 'suspicious_activity')
             }
         }
         
         logger.info(f"Analysis complete: {len(events)} events detected")
         
-        return AnalysisResult(
+        # Serialized by orjson directly (numpy scalars in event details included),
+        # skipping FastAPI's response_model re-validation pass
+        return ORJSONResponse(AnalysisResult(
             success=True,
             total_frames=total_frames,
             events=events,
             summary=summary
-        )
+        ).model_dump())
         
     except HTTPException:
         # Re-raise HTTPExceptions unchanged
@@ -263,11 +362,73 @@ async def analyze_video(
         raise HTTPException(status_code=500, detail="Internal processing error. Check server logs.")
     
     finally:
+        # Let an in-flight read finish before the capture is released
+        if pending is not None:
+            await asyncio.wait([pending])
+        
+        # Release the capture before its in-memory stream can be freed (no-op if already released)
+        if cap is not None:
+            cap.release()
+        
         # Cleanup temp file
-        if os.path.exists(temp_file.name):
+        if temp_file is not None and os.path.exists(temp_file.name):
             os.unlink(temp_file.name)
 
 
+def _track_centers(tracks: List[Dict]) -> np.ndarray:
+    """
+    Compute the bounding box centers of tracks
+    
+    Args:
+        tracks: Tracks as returned by the tracker
+        
+    Returns:
+        (N, 2) array of (x, y) centers
+    """
+    bboxes = np.asarray([t['bbox'] for t in tracks], dtype=np.float64).reshape(-1, 4)
+    return (bboxes[:, :2] + bboxes[:, 2:]) * 0.5
+
+
+def _nearest_distances(centers: np.ndarray) -> np.ndarray:
+    """
+    Compute the distance from each track center to its nearest other center
+    
+    Args:
+        centers: (N, 2) array of (x, y) centers
+        
+    Returns:
+        (N,) array of distances (inf when there is no other track)
+    """
+    if len(centers) < 2:
+        return np.full(len(centers), np.inf)
+    # k=2: the nearest hit of every point is the point itself
+    dists, _ = cKDTree(centers).query(centers, k=2)
+    return dists[:, 1]
+
+
+def _crop_roi(frame: np.ndarray, bbox: List[float], pad: float = 1.0) -> np.ndarray:
+    """
+    Crop the region of interest around a bounding box for an event snapshot
+    
+    Args:
+        frame: Input frame
+        bbox: [x1, y1, x2, y2] bounding box
+        pad: Margin added on each side, as a fraction of the box width/height
+        
+    Returns:
+        View of the frame clipped to its borders
+    """
+    h, w = frame.shape[:2]
+    x1, y1, x2, y2 = bbox
+    pad_x = pad * (x2 - x1)
+    pad_y = pad * (y2 - y1)
+    x1, x2 = max(0, int(x1 - pad_x)), min(w, int(x2 + pad_x))
+    y1, y2 = max(0, int(y1 - pad_y)), min(h, int(y2 + pad_y))
+    if x2 <= x1 or y2 <= y1:
+        return frame
+    return frame[y1:y2, x1:x2]
+
+
 def _encode_frame(frame: np.ndarray, max_size: int = 400) -> str:
     """
     Encode frame as base64 JPEG
@@ -287,10 +448,106 @@ def _encode_frame(frame: np.ndarray, max_size: int = 400) -> str:
         new_h = int(h * scale)
         frame = cv2.resize(frame, (new_w, new_h))
     
-    # Encode as JPEG
-    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+    # Encode as JPEG and base64 straight from the encoder's buffer into the data URL
+    return _data_url(_jpeg_buffer(frame, quality=80))
+
+
+def _encode_preview(frame: np.ndarray, max_width: int, quality: int = 70, dst: Optional[np.ndarray] = None):
+    """
+    Downscale a live frame to at most max_width and encode it once for every sink
+    (MJPEG buffer, preview message, full-frame alert snapshots)
+    
+    Args:
+        frame: Input frame
+        max_width: Maximum width in pixels
+        quality: JPEG quality (0-100)
+        dst: Reusable buffer for the downscaled frame, used when its shape matches
+        
+    Returns:
+        (JPEG bytes, base64 data URL, width, height)
+    """
+    h, w = frame.shape[:2]
+    size = _preview_size(w, h, max_width)
+    if size != (w, h):
+        if dst is None or dst.shape != (size[1], size[0]) + frame.shape[2:]:
+            dst = None
+        frame = cv2.resize(frame, size, dst=dst)
+    jpeg = _encode_jpeg(frame, quality)
+    return jpeg, _data_url(jpeg), frame.shape[1], frame.shape[0]
+
+
+def _preview_size(width: int, height: int, max_width: int) -> Tuple[int, int]:
+    """(width, height) of a frame downscaled to at most max_width"""
+    if width <= max_width:
+        return width, height
+    scale = max_width / width
+    return int(width * scale), int(height * scale)
+
+
+def _data_url(buffer) -> str:
+    """Base64-encode a JPEG buffer straight into a data URL"""
+    return (_DATA_URL_PREFIX + binascii.b2a_base64(buffer, newline=False)).decode('ascii')
+
+
+def _encode_jpeg(frame: np.ndarray, quality: int = 80) -> bytes:
+    """
+    Encode a BGR frame as baseline JPEG
+    
+    Args:
+        frame: Input frame
+        quality: JPEG quality (0-100)
+        
+    Returns:
+        JPEG bytes
+    """
+    return bytes(_jpeg_buffer(frame, quality))
+
+
+def _resolve_nvjpeg() -> bool:
+    """Check once whether frames can be JPEG-encoded on the GPU with nvJPEG"""
+    global _nvjpeg, _torch, _encode_jpeg_tensor
+    available = False
+    try:
+        import torch
+        import torchvision
+        from torchvision.io import encode_jpeg
+        version = tuple(int(part) for part in torchvision.__version__.split('+')[0].split('.')[:2])
+        if version >= (0, 19) and torch.cuda.is_available():
+            _torch, _encode_jpeg_tensor = torch, encode_jpeg
+            available = True
+    except (ImportError, RuntimeError, ValueError):
+        pass
+    _nvjpeg = available
+    return available
+
+
+def _disable_nvjpeg(error: Exception):
+    """Fall back to CPU encoding for good after a failed GPU encode"""
+    global _nvjpeg
+    if _nvjpeg:
+        _nvjpeg = False
+        logger.warning(f"nvJPEG encode failed, using OpenCV from now on: {error}")
+
+
+def _jpeg_buffer(frame: np.ndarray, quality: int) -> Union[bytes, np.ndarray]:
+    """Encode a BGR frame as baseline JPEG into whatever buffer the encoder returns (no copy)"""
+    # Neither PyTurboJPEG nor cv2.imencode can encode into a caller-provided buffer, so
+    # there is no scratch buffer to reuse; both return one exact-size buffer per call
+    if _tj is not None:
+        return _tj.encode(frame, quality=quality, jpeg_subsample=TJSAMP_420)
     
-    # Convert to base64
-    jpg_base64 = base64.b64encode(buffer).decode('utf-8')
+    if _nvjpeg or (_nvjpeg is None and _resolve_nvjpeg()):
+        try:
+            # HWC BGR -> CHW RGB on the device; only the JPEG bytes come back
+            image = _torch.from_numpy(frame).cuda(non_blocking=True).flip(2).permute(2, 0, 1).contiguous()
+            return _encode_jpeg_tensor(image, quality=quality).cpu().numpy()
+        except RuntimeError as e:  # e.g. torchvision built without GPU JPEG support
+            _disable_nvjpeg(e)
     
-    return f"data:image/jpeg;base64,{jpg_base64}"
+    # Single-pass baseline encoding: no Huffman optimization or progressive scans
+    _, buffer = cv2.imencode('.jpg', frame, [
+        cv2.IMWRITE_JPEG_QUALITY, quality,
+        cv2.IMWRITE_JPEG_OPTIMIZE, 0,
+        cv2.IMWRITE_JPEG_PROGRESSIVE, 0
+    ])
+    return buffer
@@ -4,66 +4,195 @@ Real-time video streaming with anomaly alerts
 """
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse
-from typing import List, Set
-import json
+from typing import Dict, List, Optional, Set, Tuple, Union
 import asyncio
 import logging
-from datetime import datetime
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from time import monotonic, time_ns
+
+import orjson
+
+from ._messages import AlertMessage, DetectionMessage, FrameMessage, FrameUpdateMessage, Message, TrackingMessage
+
+try:
+    import ormsgpack
+except ImportError:  # MessagePack clients then receive JSON text like everyone else
+    ormsgpack = None
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _dumps(message: Message) -> str:
+    """Serialize a WebSocket message with orjson (message dataclasses, numpy arrays and scalars included)"""
+    return orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+def _packb(message: Message) -> bytes:
+    """Serialize a WebSocket message as MessagePack (message dataclasses, numpy arrays and scalars included)"""
+    return ormsgpack.packb(message, option=ormsgpack.OPT_SERIALIZE_NUMPY)
+
+
+# zlib level for ?compress=deflate clients (payloads are compressed once per broadcast)
+_DEFLATE_LEVEL = 6
+
+# Outgoing messages buffered per client; when full the oldest is dropped, so a slow
+# client loses stale updates instead of stalling the live loop and the other clients
+_SEND_QUEUE_SIZE = 8
+
+
 class ConnectionManager:
     """Manages WebSocket connections"""
     
     def __init__(self):
         self.active_connections: Set[WebSocket] = set()
+        self.binary_connections: Set[WebSocket] = set()  # clients that asked for MessagePack
+        self.deflate_connections: Set[WebSocket] = set()  # clients that asked for zlib-compressed messages
+        self.send_queues: Dict[WebSocket, asyncio.Queue] = {}
+        self.drain_tasks: Dict[WebSocket, asyncio.Task] = {}
     
     async def connect(self, websocket: WebSocket):
-        """Accept new WebSocket connection"""
+        """
+        Accept new WebSocket connection
+
+        ?fmt=msgpack selects binary MessagePack messages; ?compress=deflate sends every
+        message as a zlib-compressed binary frame (decompress with DecompressionStream('deflate'))
+        """
         await websocket.accept()
         self.active_connections.add(websocket)
+        if websocket.query_params.get('fmt') == 'msgpack':
+            if ormsgpack is not None:
+                self.binary_connections.add(websocket)
+            else:
+                logger.warning("MessagePack requested but ormsgpack is not installed; sending JSON")
+        if websocket.query_params.get('compress') == 'deflate':
+            self.deflate_connections.add(websocket)
+        self.send_queues[websocket] = asyncio.Queue(maxsize=_SEND_QUEUE_SIZE)
+        self.drain_tasks[websocket] = asyncio.create_task(self._drain(websocket))
         logger.info(f"New WebSocket connection. Total: {len(self.active_connections)}")
     
     def disconnect(self, websocket: WebSocket):
         """Remove WebSocket connection"""
         self.active_connections.discard(websocket)
+        self.binary_connections.discard(websocket)
+        self.deflate_connections.discard(websocket)
+        self.send_queues.pop(websocket, None)
+        task = self.drain_tasks.pop(websocket, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
         logger.info(f"WebSocket disconnected. Total: {len(self.active_connections)}")
     
-    async def send_personal_message(self, message: dict, websocket: WebSocket):
+    async def send_personal_message(self, message: Message, websocket: WebSocket):
         """Send message to specific client"""
+        self._enqueue(websocket, self._encode(message, *self._wire_format(websocket)))
+    
+    async def broadcast(self, message: Message):
+        """Broadcast message to all connected clients without waiting for the sends"""
+        # Encode (and compress) once per wire format in use, not once per client
+        payloads = {}
+        for conn in list(self.active_connections):
+            wire_format = self._wire_format(conn)
+            if wire_format not in payloads:
+                payloads[wire_format] = self._encode(message, *wire_format)
+            self._enqueue(conn, payloads[wire_format])
+    
+    def _wire_format(self, websocket: WebSocket):
+        """(MessagePack, deflate) flags of a client"""
+        return websocket in self.binary_connections, websocket in self.deflate_connections
+    
+    @staticmethod
+    def _encode(message: Message, binary: bool, deflate: bool) -> Union[str, bytes]:
+        """Encode a message for one wire format"""
+        if binary:
+            payload = _packb(message)
+        elif deflate:
+            payload = orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY)
+        else:
+            return _dumps(message)
+        return zlib.compress(payload, _DEFLATE_LEVEL) if deflate else payload
+    
+    def _enqueue(self, websocket: WebSocket, payload: Union[str, bytes]):
+        """Queue a pre-encoded message for one client, dropping its oldest queued message when full"""
+        queue = self.send_queues.get(websocket)
+        if queue is None:
+            return
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(payload)
+    
+    async def _drain(self, websocket: WebSocket):
+        """Send one client's queued messages in order until it disconnects"""
+        queue = self.send_queues[websocket]
         try:
-            await websocket.send_json(message)
+            while True:
+                payload = await queue.get()
+                if isinstance(payload, bytes):
+                    await websocket.send_bytes(payload)
+                else:
+                    await websocket.send_text(payload)
+        except asyncio.CancelledError:
+            pass
         except Exception as e:
-            logger.error(f"Failed to send message: {e}")
+            logger.error(f"Failed to send message to client: {e!r}")
             self.disconnect(websocket)
-    
-    async def broadcast(self, message: dict):
-        """Broadcast message to all connected clients"""
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Failed to broadcast to client: {e}")
-                disconnected.append(connection)
-        
-        # Remove disconnected clients
-        for conn in disconnected:
-            self.disconnect(conn)
 
 
 # Global connection manager
 manager = ConnectionManager()
 live_task = None
 live_source = None
-# Raw JPEG bytes for MJPEG preview (updated each frame)
+# Raw JPEG bytes for MJPEG preview (updated each frame while anyone is watching)
 last_live_jpeg = None
-# Alert cooldown tracking: {(event_type, track_id or None): last_timestamp}
-_alert_last_ts = {}
+mjpeg_subscribers = 0  # open /mjpeg responses
+# JPEG encoding for the live stream (OpenCV releases the GIL), kept off the event loop
+_encode_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="encode")
+# Alert cooldown tracking: {(event_type, track_id or None): last monotonic time}
+_alert_last_ts: "OrderedDict[Tuple[str, Optional[int]], float]" = OrderedDict()
 _ALERT_COOLDOWN_SEC = 5.0
+# Alert persistence: a live alert is held until its condition has been positive for this
+# many consecutive checks, suppressing one-frame spurious detections
+_ALERT_PERSISTENCE = 2
+# {(event_type, track_id or None): (consecutive positive checks, alert held)}
+_alert_runs: "OrderedDict[Tuple[str, Optional[int]], Tuple[int, bool]]" = OrderedDict()
+_ALERT_STATE_MAX_KEYS = 4096  # per store; least recently updated keys are evicted first
+# Live stream frames between overcrowding checks
+_OVERCROWDING_CHECK_INTERVAL = 5
+# Frames a file source is decoded ahead of processing (live sources keep only the newest)
+_PREFETCH_FRAMES = 4
+
+
+def _apply_config(config: dict):
+    """
+    Apply client config (thresholds, restricted zones) to the shared anomaly detectors
+    
+    Args:
+        config: Config dictionary; keys that are missing leave the current setting
+    """
+    from main import app_state
+    overcrowding = app_state.get('overcrowding')
+    loitering = app_state.get('loitering')
+    zone_violation = app_state.get('zone_violation')
+    suspicious = app_state.get('suspicious')
+
+    if overcrowding and 'overcrowding_threshold' in config:
+        overcrowding.threshold = int(config['overcrowding_threshold'])
+    if loitering:
+        if 'loitering_distance' in config:
+            loitering.pixel_threshold = float(config['loitering_distance'])
+        if 'loitering_time' in config:
+            loitering.time_threshold = int(config['loitering_time'])
+        # Optionally FPS override
+        if 'fps' in config:
+            loitering.fps = int(config['fps'])
+        loitering.frame_threshold = int(loitering.time_threshold * loitering.fps)
+    if suspicious and 'velocity_threshold' in config:
+        suspicious.velocity_threshold = float(config['velocity_threshold'])
+    if zone_violation and 'restricted_zones' in config:
+        zone_violation.set_zones(config['restricted_zones'])
 
 
 @router.websocket("/ws")
@@ -71,7 +200,7 @@ async def websocket_endpoint(websocket: WebSocket):
     """
     WebSocket endpoint for real-time streaming
     
-    Receives:
+    Receives (JSON text):
         - Configuration updates
         - Start/stop stream commands
         
@@ -79,6 +208,8 @@ async def websocket_endpoint(websocket: WebSocket):
         - Real-time detections
         - Anomaly alerts
         - Frame metadata
+        
+    Messages are JSON text, or binary MessagePack when connected with ?fmt=msgpack.
     """
     await manager.connect(websocket)
     
@@ -87,70 +218,48 @@ async def websocket_endpoint(websocket: WebSocket):
         while True:
             # Receive messages from client
             data = await websocket.receive_text()
-            message = json.loads(data)
+            message = orjson.loads(data)
             
             command = message.get('command')
             
             if command == 'ping':
                 # Respond to keepalive
-                await websocket.send_json({
+                await manager.send_personal_message({
                     'type': 'pong',
-                    'timestamp': datetime.now().isoformat()
-                })
+                    'ts_ns': time_ns()
+                }, websocket)
             
             elif command == 'update_config':
                 # Handle configuration updates
                 config = message.get('config', {})
                 logger.info(f"Config update received: {config}")
                 try:
-                    from main import app_state
-                    overcrowding = app_state.get('overcrowding')
-                    loitering = app_state.get('loitering')
-                    zone_violation = app_state.get('zone_violation')
-                    suspicious = app_state.get('suspicious')
-
-                    if overcrowding and 'overcrowding_threshold' in config:
-                        overcrowding.threshold = int(config['overcrowding_threshold'])
-                    if loitering:
-                        if 'loitering_distance' in config:
-                            loitering.pixel_threshold = float(config['loitering_distance'])
-                        if 'loitering_time' in config:
-                            loitering.time_threshold = int(config['loitering_time'])
-                        # Optionally FPS override
-                        if 'fps' in config:
-                            loitering.fps = int(config['fps'])
-                        loitering.frame_threshold = int(loitering.time_threshold * loitering.fps)
-                    if suspicious and 'velocity_threshold' in config:
-                        suspicious.velocity_threshold = float(config['velocity_threshold'])
-                    if zone_violation and 'restricted_zones' in config:
-                        zone_violation.clear_zones()
-                        for zone in config['restricted_zones']:
-                            zone_violation.add_zone([tuple(p) for p in zone])
+                    _apply_config(config)
                 except Exception as e:
                     logger.error(f"Failed applying config update: {e}", exc_info=True)
                 
-                await websocket.send_json({
+                await manager.send_personal_message({
                     'type': 'config_updated',
                     'config': config,
-                    'timestamp': datetime.now().isoformat()
-                })
+                    'ts_ns': time_ns()
+                }, websocket)
             
             elif command == 'get_status':
                 # Send current status
-                await websocket.send_json({
+                await manager.send_personal_message({
                     'type': 'status',
                     'active_connections': len(manager.active_connections),
                     'live_running': bool(live_task),
                     'live_source': live_source,
-                    'timestamp': datetime.now().isoformat()
-                })
+                    'ts_ns': time_ns()
+                }, websocket)
 
             elif command == 'start_stream':
                 # Start live CCTV/IP camera stream
                 source_url = message.get('source')
                 config = message.get('config', {})
                 if not source_url:
-                    await websocket.send_json({'type': 'error', 'message': 'source URL missing'})
+                    await manager.send_personal_message({'type': 'error', 'message': 'source URL missing'}, websocket)
                     continue
                 # Cancel any existing live task
                 if live_task:
@@ -158,14 +267,14 @@ async def websocket_endpoint(websocket: WebSocket):
                     live_task = None
                 live_source = source_url
                 live_task = asyncio.create_task(_run_live_stream(source_url, config))
-                await websocket.send_json({'type': 'live_started', 'source': source_url})
+                await manager.send_personal_message({'type': 'live_started', 'source': source_url}, websocket)
 
             elif command == 'stop_stream':
                 if live_task:
                     live_task.cancel()
                     live_task = None
                 live_source = None
-                await websocket.send_json({'type': 'live_stopped'})
+                await manager.send_personal_message({'type': 'live_stopped'}, websocket)
             
             else:
                 logger.warning(f"Unknown command: {command}")
@@ -179,26 +288,92 @@ async def websocket_endpoint(websocket: WebSocket):
         manager.disconnect(websocket)
 
 
-async def send_detection_update(detections: List[dict], frame_number: int):
+async def send_detection_update(detections: List[dict], frame_number: int, ts_ns: Optional[int] = None):
     """
     Send detection update to all clients
     
     Args:
         detections: List of detection dictionaries
         frame_number: Current frame number
+        ts_ns: Capture time of the frame in ns since the epoch (now if None)
     """
-    message = {
-        'type': 'detection',
-        'frame_number': frame_number,
-        'detections': detections,
-        'count': len(detections),
-        'timestamp': datetime.now().isoformat()
-    }
+    message = DetectionMessage(
+        frame_number=frame_number,
+        detections=detections,
+        count=len(detections),
+        ts_ns=ts_ns if ts_ns is not None else time_ns()
+    )
     
     await manager.broadcast(message)
 
 
-async def send_anomaly_alert(event_type: str, details: dict, frame_number: int, snapshot: str = None):
+def _remember(store: OrderedDict, key: tuple, value):
+    """Set a key in a bounded alert state store, evicting the least recently updated key"""
+    store[key] = value
+    store.move_to_end(key)
+    if len(store) > _ALERT_STATE_MAX_KEYS:
+        store.popitem(last=False)
+
+
+def _alert_due(event_type: str, track_id: Optional[int]) -> bool:
+    """
+    Debounce repeated alerts per event/track within the cooldown window
+
+    Args:
+        event_type: Type of anomaly
+        track_id: Track the alert is about (None for frame-level alerts)
+
+    Returns:
+        True if the alert should be sent (and starts a new cooldown)
+    """
+    key = (event_type, track_id)
+    now = monotonic()
+    last = _alert_last_ts.get(key)
+    if last is not None and now - last < _ALERT_COOLDOWN_SEC:
+        return False
+    _remember(_alert_last_ts, key, now)
+    return True
+
+
+def _alert_persisted(event_type: str, track_id: Optional[int], positive: bool, triggered: bool) -> bool:
+    """
+    Apply the persistence rule r_t = r_{t-1} + 1 if positive else 0 to an event/track
+
+    Detector alerts fire once on the state change, so a triggered alert is held until
+    r_t reaches _ALERT_PERSISTENCE and dropped if the condition clears first.
+
+    Args:
+        event_type: Type of anomaly
+        track_id: Track the check is about (None for frame-level checks)
+        positive: Whether the anomaly condition holds at this check
+        triggered: Whether the detector raised an alert at this check
+
+    Returns:
+        True if a held alert has persisted long enough to be sent now
+    """
+    key = (event_type, track_id)
+    run, held = _alert_runs.get(key, (0, False))
+    run = run + 1 if positive else 0
+    held = positive and (held or triggered)
+    release = held and run >= _ALERT_PERSISTENCE
+    _remember(_alert_runs, key, (run, held and not release))
+    return release
+
+
+def _alert_message(event_type: str, details: dict, frame_number: int, snapshot: str = None,
+                   ts_ns: Optional[int] = None) -> AlertMessage:
+    """Build an anomaly alert message (see send_anomaly_alert)"""
+    return AlertMessage(
+        event_type=event_type,
+        frame_number=frame_number,
+        details=details or {},  # numpy values are handled by _dumps
+        ts_ns=ts_ns if ts_ns is not None else time_ns(),
+        snapshot=snapshot
+    )
+
+
+async def send_anomaly_alert(event_type: str, details: dict, frame_number: int, snapshot: str = None,
+                             ts_ns: Optional[int] = None):
     """
     Send anomaly alert to all clients
     
@@ -207,71 +382,47 @@ async def send_anomaly_alert(event_type: str, details: dict, frame_number: int,
         details: Event details dictionary
         frame_number: Frame number where event occurred
         snapshot: Optional base64 encoded snapshot
+        ts_ns: Capture time of the frame in ns since the epoch (now if None)
     """
-    # Debounce repeated alerts per event/track within cooldown window
-    track_id = details.get('track_id')
-    key = (event_type, track_id)
-    try:
-        from time import time
-        now = time()
-        last = _alert_last_ts.get(key, 0)
-        if now - last < _ALERT_COOLDOWN_SEC:
-            return
-        _alert_last_ts[key] = now
-    except Exception:
-        pass
-
-    # Sanitize details to ensure JSON-serializable native Python types
-    def _to_py(val):
-        try:
-            import numpy as np
-            if isinstance(val, (np.bool_,)):
-                return bool(val)
-            if isinstance(val, (np.integer,)):
-                return int(val)
-            if isinstance(val, (np.floating,)):
-                return float(val)
-            if isinstance(val, (np.ndarray,)):
-                return val.tolist()
-        except Exception:
-            pass
-        return val
-
-    try:
-        safe_details = {k: _to_py(v) for k, v in (details or {}).items()}
-    except Exception:
-        safe_details = details or {}
-
-    message = {
-        'type': 'alert',
-        'event_type': event_type,
-        'frame_number': frame_number,
-        'details': safe_details,
-        'timestamp': datetime.now().isoformat(),
-        'snapshot': snapshot
-    }
+    if not _alert_due(event_type, details.get('track_id')):
+        return
     
-    await manager.broadcast(message)
+    await manager.broadcast(_alert_message(event_type, details, frame_number, snapshot, ts_ns))
 
 
-async def send_tracking_update(tracks: List[dict], frame_number: int):
+async def send_tracking_update(tracks: List[dict], frame_number: int, ts_ns: Optional[int] = None):
     """
     Send tracking update to all clients
     
     Args:
         tracks: List of tracked objects
         frame_number: Current frame number
+        ts_ns: Capture time of the frame in ns since the epoch (now if None)
     """
-    message = {
-        'type': 'tracking',
-        'frame_number': frame_number,
-        'tracks': tracks,
-        'timestamp': datetime.now().isoformat()
-    }
+    message = TrackingMessage(
+        frame_number=frame_number,
+        tracks=tracks,
+        ts_ns=ts_ns if ts_ns is not None else time_ns()
+    )
     
     await manager.broadcast(message)
 
 
+# Static part of each multipart/x-mixed-replace part header; only Content-Length varies
+_MJPEG_PART_HEADER = b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: "
+
+
+@lru_cache(maxsize=1)
+def _mjpeg_placeholder() -> bytes:
+    """JPEG shown on /mjpeg while no live frame is available (encoded once per process)"""
+    import cv2
+    import numpy as np
+    img = np.zeros((240, 320, 3), dtype=np.uint8)
+    cv2.putText(img, 'Waiting for stream...', (10, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,255,255), 1, cv2.LINE_AA)
+    _, buf = cv2.imencode('.jpg', img)
+    return buf.tobytes()
+
+
 @router.get("/mjpeg")
 async def mjpeg_stream():
     """MJPEG streaming endpoint for smooth live preview.
@@ -279,41 +430,33 @@ async def mjpeg_stream():
     Serves multipart/x-mixed-replace with latest JPEG frames produced by the live stream loop.
     If no live stream is active, yields a placeholder frame periodically.
     """
-    import cv2
-    import numpy as np
     from time import time
-    boundary = b"frame"
 
     async def frame_gen():
-        global last_live_jpeg, live_task
-        placeholder = None
-        last_sent_ts = 0.0
+        global mjpeg_subscribers
         target_interval = 1.0 / 25.0  # ~25 FPS display if frames available
-        while True:
-            start = time()
-            frame_bytes = last_live_jpeg
-            if frame_bytes is None:
-                if placeholder is None:
-                    # Create a simple placeholder image
-                    img = np.zeros((240, 320, 3), dtype=np.uint8)
-                    cv2.putText(img, 'Waiting for stream...', (10, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,255,255), 1, cv2.LINE_AA)
-                    ok, buf = cv2.imencode('.jpg', img)
-                    if ok:
-                        placeholder = buf.tobytes()
-                frame_bytes = placeholder
-            # Build multipart frame
-            yield b"--" + boundary + b"\r\n" + b"Content-Type: image/jpeg\r\n" + b"Content-Length: " + str(len(frame_bytes)).encode() + b"\r\n\r\n" + frame_bytes + b"\r\n"
-            # Sleep to regulate output rate
-            elapsed = time() - start
-            sleep_for = max(0.0, target_interval - elapsed)
-            await asyncio.sleep(sleep_for)
-            # If stream task ended, keep placeholder frames
+        mjpeg_subscribers += 1
+        try:
+            while True:
+                start = time()
+                frame_bytes = last_live_jpeg or _mjpeg_placeholder()
+                # Build multipart frame
+                yield b"".join((_MJPEG_PART_HEADER, b"%d\r\n\r\n" % len(frame_bytes), frame_bytes, b"\r\n"))
+                # Sleep to regulate output rate
+                elapsed = time() - start
+                sleep_for = max(0.0, target_interval - elapsed)
+                await asyncio.sleep(sleep_for)
+                # If stream task ended, keep placeholder frames
+        finally:
+            mjpeg_subscribers -= 1
+
     return StreamingResponse(frame_gen(), media_type='multipart/x-mixed-replace; boundary=frame')
 
 
 async def _run_live_stream(source: str, config: dict):
     """Run live stream processing loop and broadcast detections/alerts."""
     import cv2
+    import numpy as np
     from main import app_state
     from models.detector import PersonDetector
     from tracking.deepsort import DeepSORT
@@ -321,8 +464,9 @@ async def _run_live_stream(source: str, config: dict):
     from anomaly.loitering import LoiteringDetector
     from anomaly.zone_violation import ZoneViolationDetector
     from anomaly.suspicious_activity import SuspiciousActivityDetector
-    from utils.video_stream import VideoStream
-    from .analyze import _encode_frame
+    from utils.video_stream import FrameGrabber, VideoStream
+    from .analyze import (_crop_roi, _detect_executor, _encode_frame, _encode_preview, _nearest_distances,
+                          _preview_size, _track_centers)
 
     # Reuse initialized components
     detector = app_state.get('detector') or PersonDetector()
@@ -332,24 +476,13 @@ async def _run_live_stream(source: str, config: dict):
     loitering = app_state['loitering']
     zone_violation = app_state['zone_violation']
     suspicious = app_state['suspicious']
+    pool = app_state['pool']
+    loop = asyncio.get_running_loop()
 
-    # Apply config thresholds if provided
-    overcrowding.threshold = int(config.get('overcrowding_threshold', overcrowding.threshold))
-    loitering.pixel_threshold = float(config.get('loitering_distance', loitering.pixel_threshold))
-    loitering.time_threshold = int(config.get('loitering_time', loitering.time_threshold))
-    # Recompute frame threshold for loitering if fps/time change
     try:
-        if 'fps' in config:
-            loitering.fps = int(config['fps'])
-        loitering.frame_threshold = int(loitering.time_threshold * loitering.fps)
-    except Exception:
-        pass
-    suspicious.velocity_threshold = float(config.get('velocity_threshold', suspicious.velocity_threshold))
-    # Zones
-    if 'restricted_zones' in config:
-        zone_violation.clear_zones()
-        for zone in config['restricted_zones']:
-            zone_violation.add_zone([tuple(p) for p in zone])
+        _apply_config(config)
+    except Exception as e:
+        logger.error(f"Failed applying live stream config: {e}", exc_info=True)
 
     frame_num = 0
     # Preview settings (can be overridden by client config)
@@ -362,116 +495,131 @@ async def _run_live_stream(source: str, config: dict):
     except Exception:
         preview_max_width = 960
     global last_live_jpeg
+    frame_encoded = None  # current frame's _encode_preview future, shared by every sink
+    preview_buf = None  # downscaled-frame buffer reused by every preview encode (one per frame, awaited in it)
+    frame_snapshots = {}  # current frame's snapshots: track ID (None for the full frame) -> data URL
+    frame_alerts = []  # current frame's (alert message, snapshot future), sent with its frame_update
+
+    def encoded_frame() -> asyncio.Future:
+        """Start downscaling and encoding the current frame, at most once per frame"""
+        nonlocal frame_encoded
+        if frame_encoded is None:
+            frame_encoded = loop.run_in_executor(_encode_executor, _encode_preview, frame, preview_max_width, 70, preview_buf)
+        return frame_encoded
+
+    async def frame_data_url() -> str:
+        """Data URL of the current frame's shared encode"""
+        return (await encoded_frame())[1]
+
+    def snapshot(track: dict = None) -> asyncio.Future:
+        """Start encoding the snapshot of an event, at most once per frame and track region"""
+        key = None if track is None else track['id']
+        if key not in frame_snapshots:
+            if track is None:  # the full frame reuses the preview encode
+                frame_snapshots[key] = asyncio.ensure_future(frame_data_url())
+            else:
+                region = _crop_roi(frame, track['bbox'])
+                frame_snapshots[key] = loop.run_in_executor(_encode_executor, _encode_frame, region)
+        return frame_snapshots[key]
+
+    def queue_alert(event_type: str, result, positive: bool, track: dict = None):
+        """
+        Check an anomaly result for this frame and add its alert to the frame's update once it
+        has persisted; debounced before the snapshot is encoded
+        """
+        track_id = result.get('track_id')
+        if not _alert_persisted(event_type, track_id, positive, result['alert_triggered']):
+            return
+        if _alert_due(event_type, track_id):
+            details = result if isinstance(result, dict) else result.to_dict()
+            details = {**details, 'alert_triggered': True}  # raised on an earlier check of this run
+            frame_alerts.append((_alert_message(event_type, details, frame_num, None, frame_ts), snapshot(track)))
+
     try:
-        with VideoStream(source) as vs:
+        # Capture runs on its own thread so a stalled camera never blocks the event loop; live
+        # sources keep only the newest frame, files (known frame count) are read frame by frame
+        with VideoStream(source, buffer_size=_PREFETCH_FRAMES) as vs, FrameGrabber(vs, drop_old=vs.get_total_frames() <= 0) as grabber:
             last_w, last_h = None, None
             while True:
-                ret, frame = vs.read()
+                ret, frame = await asyncio.to_thread(grabber.read)
                 if not ret:
                     await manager.broadcast({'type': 'error', 'message': 'Stream ended/unavailable'})
                     break
                 frame_num += 1
+                frame_ts = time_ns()  # shared by every message about this frame
+                frame_encoded = None
 
                 # Send initial stream info
                 if last_w is None or last_h is None:
                     last_h, last_w = frame.shape[:2]
+                    preview_w, preview_h = _preview_size(last_w, last_h, preview_max_width)
+                    preview_buf = np.empty((preview_h, preview_w) + frame.shape[2:], dtype=frame.dtype)
                     await manager.broadcast({
                         'type': 'stream_info',
                         'width': last_w,
                         'height': last_h
                     })
 
-                # Detection
-                detections = detector.detect_people(frame)
+                # Detection, on the detect worker so the model lock is never taken on the loop
+                detections = await loop.run_in_executor(_detect_executor, detector.detect_people, frame)
                 detection_list = [[*bbox, conf] for bbox, conf, _ in detections]
                 # Tracking
                 tracks = tracker.update(detection_list, frame)
 
-                # Send detection count
-                await send_detection_update(
-                    [{'bbox': bbox, 'confidence': conf} for bbox, conf, _ in detections],
-                    frame_num
-                )
 
-                # Periodic preview frame for UI background/overlay
-                if preview_interval > 0 and frame_num % preview_interval == 0:
+                # Periodic preview frame for UI background/overlay (skipped with no clients)
+                if preview_interval > 0 and frame_num % preview_interval == 0 and manager.active_connections:
                     try:
-                        preview = frame
-                        # Optionally downscale large frames to reduce bandwidth
-                        if preview.shape[1] > preview_max_width:
-                            import cv2
-                            scale = preview_max_width / preview.shape[1]
-                            preview = cv2.resize(preview, (int(preview.shape[1]*scale), int(preview.shape[0]*scale)))
-                        from .analyze import _encode_frame
-                        encoded = _encode_frame(preview)
-                        await manager.broadcast({
-                            'type': 'frame',
-                            'image': encoded,
-                            'width': preview.shape[1],
-                            'height': preview.shape[0],
-                            'frame_number': frame_num
-                        })
+                        _, encoded, width, height = await encoded_frame()
+                        await manager.broadcast(FrameMessage(
+                            image=encoded,
+                            width=width,
+                            height=height,
+                            frame_number=frame_num
+                        ))
                     except Exception as _:
                         # Non-fatal if preview encoding fails
                         pass
 
-                # Always update MJPEG buffer (downscale like preview)
-                try:
-                    import cv2
-                    mjpeg_frame = frame
-                    if mjpeg_frame.shape[1] > preview_max_width:
-                        scale2 = preview_max_width / mjpeg_frame.shape[1]
-                        mjpeg_frame = cv2.resize(mjpeg_frame, (int(mjpeg_frame.shape[1]*scale2), int(mjpeg_frame.shape[0]*scale2)))
-                    ok, buf = cv2.imencode('.jpg', mjpeg_frame, [int(cv2.IMWRITE_JPEG_QUALITY), 70])
-                    if ok:
-                        last_live_jpeg = buf.tobytes()
-                except Exception:
-                    pass
+                # Update MJPEG buffer only while /mjpeg has viewers
+                if mjpeg_subscribers > 0:
+                    try:
+                        last_live_jpeg = (await encoded_frame())[0]
+                    except Exception:
+                        pass
 
                 # Check anomalies
+                frame_snapshots.clear()
+                frame_alerts.clear()
                 count = len(tracks)
-                overcrowd_result = overcrowding.detect_overcrowding(count)
-                if overcrowd_result['alert_triggered']:
-                    await send_anomaly_alert('overcrowding', overcrowd_result, frame_num, _encode_frame(frame))
-
-                active_track_ids = []
-                for track in tracks:
+                # The crowd count moves slowly; checking every few frames is enough
+                if frame_num % _OVERCROWDING_CHECK_INTERVAL == 0:
+                    overcrowd_result = overcrowding.detect_overcrowding(count)
+                    queue_alert('overcrowding', overcrowd_result, overcrowd_result['is_overcrowded'])
+
+                active_track_ids = [track['id'] for track in tracks]
+                centers = _track_centers(tracks)
+                loiter_results, zone_results, poses = await asyncio.gather(
+                    loop.run_in_executor(pool, loitering.update_tracks_and_detect, active_track_ids, centers, frame_num),
+                    loop.run_in_executor(pool, zone_violation.detect_zone_violations_batch, centers, active_track_ids),
+                    suspicious.extract_poses_async(frame, [track['bbox'] for track in tracks])
+                )
+                # Nearest-neighbor distance per track for the suspicious-activity subtypes
+                nearest = _nearest_distances(centers) if frame_num % 5 == 0 else None
+                for i, (track, loiter_result, zone_result, pose_keypoints) in enumerate(zip(tracks, loiter_results, zone_results, poses)):
                     track_id = track['id']
-                    bbox = track['bbox']
-                    active_track_ids.append(track_id)
-                    center_x = (bbox[0] + bbox[2]) / 2
-                    center_y = (bbox[1] + bbox[3]) / 2
-                    center = (center_x, center_y)
-
-                    loitering.update_track(track_id, center, frame_num)
-                    loiter_result = loitering.detect_loitering(track_id)
-                    if loiter_result['alert_triggered']:
-                        await send_anomaly_alert('loitering', loiter_result, frame_num, _encode_frame(frame))
-
-                    zone_result = zone_violation.detect_zone_violation(center, track_id=track_id)
-                    if zone_result['alert_triggered']:
-                        await send_anomaly_alert('zone_violation', zone_result, frame_num, _encode_frame(frame))
-
-                    pose_keypoints = suspicious.extract_pose(frame, bbox)
+
+                    queue_alert('loitering', loiter_result, loiter_result['is_loitering'], track)
+                    queue_alert('zone_violation', zone_result, zone_result['is_violation'], track)
+
                     if pose_keypoints is not None:
                         suspicious.update_pose_history(track_id, pose_keypoints)
                         if frame_num % 5 == 0:
-                            activity_result = suspicious.detect_fight_like_motion(track_id=track_id)
+                            activity_result = suspicious.detect_fight_like_motion(track_id=track_id).to_dict()
                             # Derive subtype heuristics using proximity to nearest neighbor
                             try:
-                                # Compute center distance to nearest other track
-                                min_dist = None
-                                for other in tracks:
-                                    if other['id'] == track_id:
-                                        continue
-                                    ob = other['bbox']
-                                    ox = (ob[0] + ob[2]) / 2
-                                    oy = (ob[1] + ob[3]) / 2
-                                    dx = ox - center_x
-                                    dy = oy - center_y
-                                    d = (dx*dx + dy*dy) ** 0.5
-                                    if min_dist is None or d < min_dist:
-                                        min_dist = d
+                                # Center distance to nearest other track
+                                min_dist = float(nearest[i]) if np.isfinite(nearest[i]) else None
                                 subtype = 'fight'
                                 if activity_result.get('is_suspicious'):
                                     arm_v = activity_result.get('arm_velocity', 0.0)
@@ -506,15 +654,27 @@ async def _run_live_stream(source: str, config: dict):
                                     else:
                                         should_alert = reliability >= 0.5
                                     activity_result['alert_triggered'] = bool(should_alert)
-                                if activity_result['alert_triggered']:
-                                    await send_anomaly_alert('suspicious_activity', activity_result, frame_num, _encode_frame(frame))
+                                queue_alert('suspicious_activity', activity_result, activity_result['alert_triggered'], track)
                             except Exception:
-                                if activity_result['alert_triggered']:
-                                    await send_anomaly_alert('suspicious_activity', activity_result, frame_num, _encode_frame(frame))
+                                queue_alert('suspicious_activity', activity_result, activity_result['alert_triggered'], track)
 
                 loitering.cleanup_old_tracks(active_track_ids)
                 suspicious.cleanup_old_tracks(active_track_ids)
 
+                # One message per frame: detections, tracks and any alerts it raised
+                alerts = []
+                for message, encoded in frame_alerts:
+                    message.snapshot = await encoded
+                    alerts.append(message)
+                await manager.broadcast(FrameUpdateMessage(
+                    frame_number=frame_num,
+                    detections=[{'bbox': bbox, 'confidence': conf} for bbox, conf, _ in detections],
+                    count=len(detections),
+                    tracks=[{'id': track['id'], 'bbox': track['bbox']} for track in tracks],
+                    alerts=alerts,
+                    ts_ns=frame_ts
+                ))
+
                 # Small async sleep to yield control; adapt to FPS if needed
                 await asyncio.sleep(0)
     except asyncio.CancelledError:
@@ -1,6 +1,8 @@
 """
 Test Anomaly Detection Modules
 """
+import threading
+
 import pytest
 import numpy as np
 from anomaly.overcrowding import OvercrowdingDetector
@@ -23,6 +25,25 @@ def test_overcrowding_detector():
     assert result['alert_triggered'] == True
 
 
+def test_overcrowding_result_is_immutable():
+    """Test overcrowding results are frozen and serialize to dicts"""
+    detector = OvercrowdingDetector(threshold=5)
+
+    result = detector.detect_overcrowding(6)
+    assert detector.detect_overcrowding(6) is not result  # alert_active changed
+    assert detector.detect_overcrowding(6) is detector.detect_overcrowding(6)
+
+    with pytest.raises(AttributeError):
+        result.severity = 'high'
+    assert result.to_dict() == {
+        'is_overcrowded': True,
+        'current_count': 6,
+        'threshold': 5,
+        'alert_triggered': True,
+        'severity': 'low'
+    }
+
+
 def test_loitering_detector():
     """Test loitering detection"""
     detector = LoiteringDetector(pixel_threshold=50.0, time_threshold=10, fps=30)
@@ -36,6 +57,73 @@ def test_loitering_detector():
     assert result['alert_triggered'] == True
 
 
+def test_loitering_ring_buffer_wraparound():
+    """Test loitering history stays bounded and ordered after wrapping"""
+    detector = LoiteringDetector(pixel_threshold=5.0, time_threshold=1, fps=10)
+    
+    # Walk far past the buffer capacity, then stand still
+    for i in range(500):
+        detector.update_track(1, (i, 0), i)
+    for i in range(500, 520):
+        detector.update_track(1, (3, 3), i)
+    
+    assert len(detector.track_buffers[1]) == detector.frame_threshold + 100
+    
+    result = detector.detect_loitering(1)
+    assert result['is_loitering'] == True
+    assert result['position'] == (3.0, 3.0)
+
+
+def test_loitering_batch():
+    """Test batched loitering detection"""
+    detector = LoiteringDetector(pixel_threshold=5.0, time_threshold=1, fps=10)
+
+    # Track 1 stands still, track 2 walks, track 3 is too new
+    for i in range(20):
+        detector.update_track(1, (50, 50), i)
+        detector.update_track(2, (10 * i, 0), i)
+    detector.update_track(3, (0, 0), 19)
+
+    results = detector.detect_loitering_batch([1, 2, 3])
+    assert [r['is_loitering'] for r in results] == [True, False, False]
+    assert [r['alert_triggered'] for r in results] == [True, False, False]
+    assert results[2]['duration_frames'] == 1
+
+    results = detector.detect_loitering_batch([1, 2, 3])
+    assert results[0]['alert_triggered'] == False
+    assert detector.loitering_tracks == {1}
+
+
+def test_loitering_concurrent_cleanup():
+    """Test batched updates on one thread while another cleans up tracks"""
+    detector = LoiteringDetector(pixel_threshold=5.0, time_threshold=1, fps=10)
+    track_ids = list(range(50))
+    centers = [(float(tid), 0.0) for tid in track_ids]
+    stop = threading.Event()
+    errors = []
+
+    def cleanup():
+        try:
+            while not stop.is_set():
+                detector.cleanup_old_tracks(track_ids[::2])
+        except Exception as e:
+            errors.append(e)
+
+    cleaner = threading.Thread(target=cleanup)
+    cleaner.start()
+    try:
+        for frame in range(300):
+            results = detector.update_tracks_and_detect(track_ids, centers, frame)
+            assert [r['track_id'] for r in results] == track_ids
+    finally:
+        stop.set()
+        cleaner.join()
+
+    assert not errors
+    detector.cleanup_old_tracks(track_ids[::2])
+    assert set(detector.track_buffers) == set(track_ids[::2])
+
+
 def test_zone_violation_detector():
     """Test zone violation detection"""
     detector = ZoneViolationDetector()
@@ -54,6 +142,56 @@ def test_zone_violation_detector():
     assert result['is_violation'] == False
 
 
+def test_zone_violation_batch():
+    """Test batched zone violation detection"""
+    detector = ZoneViolationDetector()
+    detector.add_zone([(100, 100), (200, 100), (200, 200), (100, 200)])
+    
+    results = detector.detect_zone_violations_batch([(150, 150), (300, 300)], [1, 2])
+    assert [r['is_violation'] for r in results] == [True, False]
+    assert [r['alert_triggered'] for r in results] == [True, False]
+    
+    # Alert fires only on state change
+    results = detector.detect_zone_violations_batch([(150, 150), (150, 150)], [1, 2])
+    assert [r['alert_triggered'] for r in results] == [False, True]
+    
+    results = detector.detect_zone_violations_batch([(300, 300)], [1])
+    assert detector.violating_tracks == {2}
+
+
+def test_zone_set_zones():
+    """Test replacing all zones at once"""
+    detector = ZoneViolationDetector()
+    detector.add_zone([(0, 0), (10, 0), (10, 10)])
+    detector.detect_zone_violations_batch([(2, 1)], [1])
+    
+    # Too-short zones are skipped; arrays are accepted
+    detector.set_zones([np.array([[100, 100], [200, 100], [200, 200], [100, 200]]), [(0, 0), (1, 1)]])
+    assert detector.get_zones() == [[(100.0, 100.0), (200.0, 100.0), (200.0, 200.0), (100.0, 200.0)]]
+    assert detector.violating_tracks == set()
+    
+    results = detector.detect_zone_violations_batch([(2, 1), (150, 150)], [1, 2])
+    assert [r['is_violation'] for r in results] == [False, True]
+
+
+def test_zone_batch_contains():
+    """Test batched containment, convex, concave and self-intersecting zones, with and without Numba"""
+    detector = ZoneViolationDetector()
+    detector.set_zones([
+        [(100, 100), (200, 100), (200, 200), (100, 200)],
+        [(0, 0), (60, 0), (60, 60), (30, 20), (0, 60)],  # concave
+        [(500, 400), (559, 581), (405, 469), (595, 469), (441, 581)],  # self-intersecting star
+    ])
+    # The star's center is enclosed twice, so even-odd containment puts it outside
+    points = [(150, 150), (30, 10), (30, 40), (300, 300), (500, 500), (500, 420)]
+    expected = [[True, False, False], [False, True, False], [False, False, False], [False, False, False],
+                [False, False, False], [False, False, True]]
+
+    assert detector.batch_contains(points).tolist() == expected
+    detector._use_numba = False
+    assert detector.batch_contains(points).tolist() == expected
+
+
 def test_zone_point_in_polygon():
     """Test point in polygon algorithm"""
     detector = ZoneViolationDetector()
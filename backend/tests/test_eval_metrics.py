@@ -0,0 +1,54 @@
+"""
+Test Evaluation Metrics Script
+"""
+import sys
+from pathlib import Path
+
+import pytest
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'scripts'))
+from eval_metrics import filter_tracks, match_detections
+
+
+def test_match_detections_optimal():
+    """Test that matching is one-to-one optimal, not greedy per prediction"""
+    ground_truths = [[0, 0, 10, 10], [4, 0, 14, 10]]
+    # Greedy would give the first prediction the first ground truth (IOU 0.82) and leave
+    # the second prediction with IOU 0.25; the optimal matching pairs both above 0.5
+    predictions = [[1, 0, 11, 10], [-2, 0, 8, 10]]
+
+    assert match_detections(predictions, ground_truths, iou_threshold=0.5) == (2, 0, 0)
+
+    # Pairs below the threshold never count
+    assert match_detections([[100, 100, 110, 110]], ground_truths) == (0, 1, 2)
+
+
+def test_match_detections_empty():
+    """Test frames without predictions or without ground truth"""
+    assert match_detections([], [[0, 0, 10, 10], [20, 0, 30, 10]]) == (0, 0, 2)
+    assert match_detections([[0, 0, 10, 10]], []) == (0, 1, 0)
+    assert match_detections([], []) == (0, 0, 0)
+
+
+def test_filter_tracks():
+    """Test filtering recorded tracks frame by frame, gaps and per-frame order included"""
+    frame_tracks = [
+        [{'id': 1, 'bbox': [0, 0, 10, 20]}, {'id': 2, 'bbox': [100, 0, 110, 20]}],
+        [{'id': 2, 'bbox': [102, 0, 112, 20]}],  # track 1 missed
+        [{'id': 2, 'bbox': [104, 0, 114, 20]}, {'id': 1, 'bbox': [4, 0, 14, 20]}],
+        [],
+    ]
+
+    filtered = filter_tracks(frame_tracks)
+
+    assert [len(boxes) for boxes in filtered] == [2, 1, 2, 0]
+    # First appearances are the detections themselves; later boxes stay close to them
+    assert np.allclose(filtered[0], [[0, 0, 10, 20], [100, 0, 110, 20]], atol=1e-3)
+    for boxes, tracks in zip(filtered, frame_tracks):
+        for box, track in zip(boxes, tracks):
+            assert np.allclose(box, track['bbox'], atol=3.0)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,112 @@
+"""
+Test Tracking Modules
+"""
+import pytest
+import numpy as np
+from tracking.deepsort import DeepSORT, KalmanTracker, offline_filter
+
+
+def _people(frame: int, count: int) -> np.ndarray:
+    """(count, 4) boxes of people walking apart from each other (no overlaps)"""
+    x = 40.0 * np.arange(count) + 5 + 2 * frame
+    y = 100.0 + 7 * np.arange(count) + frame
+    return np.column_stack([x, y, x + 30, y + 60])
+
+
+def test_deepsort_batched_tracks():
+    """Test stable IDs and boxes past the initial capacity, and track removal"""
+    tracker = DeepSORT(max_age=3, min_hits=1)
+    count = 20  # more than the 16 preallocated track rows
+    references = None
+    first_ids = None
+
+    for frame in range(8):
+        boxes = _people(frame, count)
+        tracks = tracker.update([[*box, 0.9] for box in boxes.tolist()])
+        if references is None:
+            references = [KalmanTracker(box) for box in boxes.tolist()]
+            first_ids = [track['id'] for track in tracks]
+        else:
+            for reference, box in zip(references, boxes.tolist()):
+                reference.predict()
+                reference.update(box)
+
+        # Same IDs every frame, boxes as from one KalmanTracker per person
+        assert [track['id'] for track in tracks] == first_ids
+        expected = [reference.get_state() for reference in references]
+        assert np.allclose([track['bbox'] for track in tracks], expected, atol=1e-6)
+    assert len(tracker.tracks) == count
+
+    # Tracks without detections are dropped after max_age frames
+    for frame in range(8, 8 + tracker.max_age):
+        tracks = tracker.update([[*box, 0.9] for box in _people(frame, count)[:15].tolist()])
+    assert [track['id'] for track in tracks] == first_ids[:15]
+    assert tracker.tracks.ids.tolist() == first_ids[:15]
+
+    # A track whose prediction turns invalid (negative area) is dropped at once
+    tracker.tracks.X[0, 2] = -1.0
+    tracks = tracker.update([[*box, 0.9] for box in _people(11, count)[1:15].tolist()])
+    assert [track['id'] for track in tracks] == first_ids[1:15]
+    assert tracker.tracks.ids.tolist() == first_ids[1:15]
+
+
+def test_offline_filter_matches_sequential():
+    """Test the parallel-scan filter against a frame-by-frame KalmanTracker, missed frames included"""
+    rng = np.random.default_rng(0)
+    frames = 100
+    centers = 200 + np.cumsum(rng.normal(0, 2, (frames, 2)), axis=0)
+    sizes = np.array([40.0, 80.0]) + rng.normal(0, 1, (frames, 2))
+    bboxes = np.hstack([centers - sizes / 2, centers + sizes / 2])
+    missed = rng.random(frames) < 0.2
+    missed[0] = False
+    missed[40:45] = True  # a longer gap
+    bboxes[missed] = np.nan
+
+    reference = KalmanTracker(bboxes[0].tolist())
+    expected = [reference.get_state()]
+    for bbox, miss in zip(bboxes[1:], missed[1:]):
+        reference.predict()
+        if not miss:
+            reference.update(bbox.tolist())
+        expected.append(reference.get_state())
+
+    assert np.allclose(offline_filter(bboxes), expected, atol=1e-6)
+
+    # A single detection is returned as is
+    assert np.allclose(offline_filter(bboxes[:1]), bboxes[:1])
+
+
+@pytest.mark.parametrize('shape', [(6, 6), (9, 4), (4, 9)])
+def test_lap_assignment_matches_scipy(shape):
+    """Test the LAPJV backend against SciPy on square, tall and wide IOU matrices"""
+    pytest.importorskip('lap')
+    rng = np.random.default_rng(sum(shape))
+    iou_matrix = rng.random(shape).astype(np.float32)
+    iou_matrix[iou_matrix < 0.3] = 0.0  # sub-threshold pairs are zeroed before the solve
+
+    lap_pairs = DeepSORT._linear_assignment(iou_matrix, maximize=True, backend='lap')
+    scipy_pairs = DeepSORT._linear_assignment(iou_matrix, maximize=True, backend='scipy')
+
+    # Unmatched rows of a tall matrix are dropped, not returned as -1
+    assert len(lap_pairs) == min(shape)
+    assert (lap_pairs >= 0).all()
+    assert sorted(map(tuple, lap_pairs.tolist())) == sorted(map(tuple, scipy_pairs.tolist()))
+
+
+def test_lap_assignment_below_threshold():
+    """Test that zero-gain pairs from LAPJV never become matches"""
+    pytest.importorskip('lap')
+    tracker = DeepSORT(iou_threshold=0.3)
+    tracker.assignment_backend = 'lap'
+    detections = np.array([[0, 0, 10, 10], [10, 0, 20, 10], [50, 50, 60, 60]], dtype=np.float64)
+    trackers = np.array([[8, 8, 18, 18], [12, 8, 22, 18]], dtype=np.float64)  # all IOUs below 0.3
+
+    matched, unmatched_dets, unmatched_trks = tracker._associate_detections_to_trackers(detections, trackers)
+
+    assert len(matched) == 0
+    assert sorted(unmatched_dets.tolist()) == [0, 1, 2]
+    assert sorted(unmatched_trks.tolist()) == [0, 1]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,49 @@
+"""
+Kalman Filter Kernels
+Predict/update steps of a linear Kalman filter on plain arrays, JIT-compiled with Numba
+"""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the kernels then run as plain NumPy
+    njit = None
+
+
+def kf_predict(x, P, F, Q):
+    """
+    Predict step, in place: x = F x, P = F P F^T + Q
+
+    Args:
+        x: State, shape (n, 1)
+        P: State covariance, shape (n, n)
+        F: State transition matrix, shape (n, n)
+        Q: Process noise covariance, shape (n, n)
+    """
+    x[:] = F @ x
+    P[:] = F @ P @ F.T + Q
+
+
+def kf_update(x, P, z, H, R):
+    """
+    Update step, in place, with the Joseph-form covariance update
+
+    Args:
+        x: State, shape (n, 1)
+        P: State covariance, shape (n, n)
+        z: Measurement, shape (m, 1)
+        H: Measurement matrix, shape (m, n)
+        R: Measurement noise covariance, shape (m, m)
+    """
+    y = z - H @ x
+    PHT = P @ H.T
+    S = H @ PHT + R
+    K = PHT @ np.linalg.inv(S)
+    x += K @ y
+    I_KH = np.eye(P.shape[0]) - K @ H
+    P[:] = I_KH @ P @ I_KH.T + K @ R @ K.T
+
+
+if njit is not None:
+    kf_predict = njit(cache=True, nogil=True)(kf_predict)
+    kf_update = njit(cache=True, nogil=True)(kf_update)
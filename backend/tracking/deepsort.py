@@ -2,12 +2,19 @@
 DeepSORT Tracker Implementation
 Multi-object tracking with appearance features
 """
+import math
 import numpy as np
-from typing import List, Tuple, Dict
-from filterpy.kalman import KalmanFilter
+from typing import List, Optional, Tuple, Dict
 from scipy.optimize import linear_sum_assignment
 import logging
 
+from ._kf_numba import kf_predict, kf_update
+
+try:
+    import lap
+except ImportError:  # lap(x) is optional; assignments then use SciPy
+    lap = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,10 +30,8 @@ class KalmanTracker:
         Args:
             bbox: [x1, y1, x2, y2]
         """
-        self.kf = KalmanFilter(dim_x=7, dim_z=4)
-        
         # State: [x, y, s, r, vx, vy, vs] where x,y is center, s is scale, r is aspect ratio
-        self.kf.F = np.array([
+        self.F = np.array([
             [1, 0, 0, 0, 1, 0, 0],
             [0, 1, 0, 0, 0, 1, 0],
             [0, 0, 1, 0, 0, 0, 1],
@@ -34,22 +39,26 @@ class KalmanTracker:
             [0, 0, 0, 0, 1, 0, 0],
             [0, 0, 0, 0, 0, 1, 0],
             [0, 0, 0, 0, 0, 0, 1]
-        ])
+        ], dtype=np.float64)
         
-        self.kf.H = np.array([
+        self.H = np.array([
             [1, 0, 0, 0, 0, 0, 0],
             [0, 1, 0, 0, 0, 0, 0],
             [0, 0, 1, 0, 0, 0, 0],
             [0, 0, 0, 1, 0, 0, 0]
-        ])
+        ], dtype=np.float64)
         
-        self.kf.R *= 10.0
-        self.kf.P[4:, 4:] *= 1000.0
-        self.kf.P *= 10.0
-        self.kf.Q[-1, -1] *= 0.01
-        self.kf.Q[4:, 4:] *= 0.01
+        self.R = np.eye(4) * 10.0
+        self.P = np.eye(7)
+        self.P[4:, 4:] *= 1000.0
+        self.P *= 10.0
+        self.Q = np.eye(7)
+        self.Q[-1, -1] *= 0.01
+        self.Q[4:, 4:] *= 0.01
         
-        self.kf.x[:4] = self._bbox_to_z(bbox)
+        self.x = np.zeros((7, 1))
+        self.x[:4, 0] = self._bbox_to_z(*bbox[:4])
+        self._z_buf = np.empty((4, 1))  # measurement scratch reused by update()
         
         self.time_since_update = 0
         self.id = KalmanTracker.count
@@ -63,44 +72,209 @@ class KalmanTracker:
         self.time_since_update = 0
         self.hits += 1
         self.hit_streak += 1
-        self.kf.update(self._bbox_to_z(bbox))
+        self._z_buf[:, 0] = self._bbox_to_z(*bbox[:4])
+        kf_update(self.x, self.P, self._z_buf, self.H, self.R)
         
     def predict(self):
         """Predict next state"""
-        if self.kf.x[6] + self.kf.x[2] <= 0:
-            self.kf.x[6] *= 0.0
-        self.kf.predict()
+        if self.x[6, 0] + self.x[2, 0] <= 0:
+            self.x[6] *= 0.0
+        kf_predict(self.x, self.P, self.F, self.Q)
         self.age += 1
         if self.time_since_update > 0:
             self.hit_streak = 0
         self.time_since_update += 1
-        return self._z_to_bbox(self.kf.x)
+        return self.get_state()
         
     def get_state(self) -> List[float]:
         """Get current bounding box"""
-        return self._z_to_bbox(self.kf.x)
+        return list(self._z_to_bbox(*self.x[:4, 0].tolist()))
     
     @staticmethod
-    def _bbox_to_z(bbox: List[float]) -> np.ndarray:
+    def _bbox_to_z(x1: float, y1: float, x2: float, y2: float) -> Tuple[float, float, float, float]:
         """Convert [x1,y1,x2,y2] to [x,y,s,r] format"""
-        w = bbox[2] - bbox[0]
-        h = bbox[3] - bbox[1]
-        x = bbox[0] + w / 2.0
-        y = bbox[1] + h / 2.0
-        s = w * h
-        r = w / float(h + 1e-6)
-        return np.array([x, y, s, r]).reshape((4, 1))
+        w = x2 - x1
+        h = y2 - y1
+        return x1 + w / 2.0, y1 + h / 2.0, w * h, w / (h + 1e-6)
+    
+    @staticmethod
+    def _z_to_bbox(x: float, y: float, s: float, r: float) -> Tuple[float, float, float, float]:
+        """Convert [x,y,s,r] to [x1,y1,x2,y2] format (NaN when s*r < 0)"""
+        sr = s * r
+        w = math.sqrt(sr) if sr >= 0 else math.nan
+        h = s / (w + 1e-6)
+        return x - w / 2.0, y - h / 2.0, x + w / 2.0, y + h / 2.0
+
+
+class _BatchedKF:
+    """
+    Kalman filters of all tracks stored as arrays (one row per track), so a frame
+    predicts and updates every track with a few batched NumPy operations
+
+    Same constant-velocity model as KalmanTracker. F and H only copy and add state
+    components, so they are applied by slicing instead of full 7x7 products.
+    """
+    
+    count = 0
+    
+    def __init__(self, capacity: int = 16):
+        """
+        Initialize an empty set of tracks
+        
+        Args:
+            capacity: Initial number of track rows preallocated (doubles as needed)
+        """
+        # Track rows live in preallocated buffers; the public arrays below are views of
+        # their first len(self) rows, so a steady track count allocates nothing per frame
+        self._n = 0
+        self._buffers = {
+            'X': np.empty((capacity, 7)),  # states [x, y, s, r, vx, vy, vs]
+            'P': np.empty((capacity, 7, 7)),  # state covariances
+            'ids': np.empty(capacity, dtype=np.int64),
+            'hits': np.empty(capacity, dtype=np.int64),
+            'hit_streak': np.empty(capacity, dtype=np.int64),
+            'age': np.empty(capacity, dtype=np.int64),
+            'time_since_update': np.empty(capacity, dtype=np.int64),
+        }
+        self._bboxes = np.empty((capacity, 4))  # predicted bboxes returned by predict_all
+        self._refresh_views()
+        
+        # Same noise covariances as KalmanTracker
+        self.R = np.eye(4) * 10.0
+        self.P0 = np.eye(7)
+        self.P0[4:, 4:] *= 1000.0
+        self.P0 *= 10.0
+        self.Q = np.eye(7)
+        self.Q[-1, -1] *= 0.01
+        self.Q[4:, 4:] *= 0.01
+    
+    def __len__(self) -> int:
+        return self._n
+    
+    def _refresh_views(self):
+        """Point the public arrays at the live rows of the buffers"""
+        for name, buf in self._buffers.items():
+            setattr(self, name, buf[:self._n])
+    
+    def _reserve(self, n: int):
+        """Grow the buffers (doubling) so that n tracks fit"""
+        capacity = len(self._bboxes)
+        if n <= capacity:
+            return
+        capacity = max(n, 2 * capacity)
+        for name, buf in self._buffers.items():
+            grown = np.empty((capacity,) + buf.shape[1:], dtype=buf.dtype)
+            grown[:self._n] = buf[:self._n]
+            self._buffers[name] = grown
+        self._bboxes = np.empty((capacity, 4))
+    
+    def add(self, bboxes: np.ndarray):
+        """
+        Start a track for each bbox
+        
+        Args:
+            bboxes: (K, 4) array of [x1, y1, x2, y2]
+        """
+        n, k = self._n, len(bboxes)
+        self._reserve(n + k)
+        rows = slice(n, n + k)
+        buffers = self._buffers
+        
+        buffers['X'][rows] = 0.0
+        buffers['X'][rows, :4] = self._bbox_to_z(bboxes)
+        buffers['P'][rows] = self.P0
+        buffers['ids'][rows] = np.arange(_BatchedKF.count, _BatchedKF.count + k)
+        _BatchedKF.count += k
+        for name in ('hits', 'hit_streak', 'age', 'time_since_update'):
+            buffers[name][rows] = 0
+        
+        self._n = n + k
+        self._refresh_views()
+    
+    def keep(self, mask: np.ndarray):
+        """Drop every track whose entry in the (N,) boolean mask is False (compacts in place)"""
+        n = int(np.count_nonzero(mask))
+        if n == self._n:
+            return
+        for buf in self._buffers.values():
+            buf[:n] = buf[:self._n][mask]
+        self._n = n
+        self._refresh_views()
+    
+    def predict_all(self) -> np.ndarray:
+        """
+        Predict the next state of every track
+        
+        Returns:
+            (N, 4) array of predicted [x1, y1, x2, y2]
+        """
+        X, P = self.X, self.P
+        X[X[:, 6] + X[:, 2] <= 0, 6] = 0.0
+        
+        # x = F x: center and scale advance by their velocities
+        X[:, :3] += X[:, 4:]
+        # P = F P F^T + Q: the same row, then column, additions
+        P[:, :3, :] += P[:, 4:, :]
+        P[:, :, :3] += P[:, :, 4:]
+        P += self.Q
+        
+        self.age += 1
+        self.hit_streak[self.time_since_update > 0] = 0
+        self.time_since_update += 1
+        return self._z_to_bbox(X, out=self._bboxes[:self._n])
+    
+    def update_all(self, idx: np.ndarray, bboxes: np.ndarray):
+        """
+        Update the matched tracks with their detections (Joseph-form covariance update)
+        
+        Args:
+            idx: (M,) indices of the matched tracks
+            bboxes: (M, 4) array of the matched [x1, y1, x2, y2]
+        """
+        X, P = self.X[idx], self.P[idx]
+        
+        # H x and H P H^T are the first 4 rows/columns of the state
+        y = self._bbox_to_z(bboxes) - X[:, :4]
+        PHT = P[:, :, :4]
+        K = PHT @ np.linalg.inv(P[:, :4, :4] + self.R)
+        X += (K @ y[:, :, None])[:, :, 0]
+        
+        I_KH = np.tile(np.eye(7), (len(idx), 1, 1))
+        I_KH[:, :, :4] -= K
+        P = I_KH @ P @ I_KH.transpose(0, 2, 1) + K @ self.R @ K.transpose(0, 2, 1)
+        
+        self.X[idx] = X
+        self.P[idx] = P
+        self.time_since_update[idx] = 0
+        self.hits[idx] += 1
+        self.hit_streak[idx] += 1
+    
+    def get_state(self) -> np.ndarray:
+        """Get the (N, 4) current bboxes"""
+        return self._z_to_bbox(self.X)
+    
+    @staticmethod
+    def _bbox_to_z(bboxes: np.ndarray) -> np.ndarray:
+        """Convert (K, 4) [x1,y1,x2,y2] rows to [x,y,s,r] rows"""
+        w = bboxes[:, 2] - bboxes[:, 0]
+        h = bboxes[:, 3] - bboxes[:, 1]
+        return np.stack([bboxes[:, 0] + w / 2.0, bboxes[:, 1] + h / 2.0, w * h, w / (h + 1e-6)], axis=1)
     
     @staticmethod
-    def _z_to_bbox(z: np.ndarray) -> List[float]:
-        """Convert [x,y,s,r] to [x1,y1,x2,y2] format"""
-        w = np.sqrt(z[2] * z[3])
-        h = z[2] / (w + 1e-6)
-        x1 = z[0] - w / 2.0
-        y1 = z[1] - h / 2.0
-        x2 = z[0] + w / 2.0
-        y2 = z[1] + h / 2.0
-        return [float(x1[0]), float(y1[0]), float(x2[0]), float(y2[0])]
+    def _z_to_bbox(X: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Convert (K, >=4) [x,y,s,r,...] rows to [x1,y1,x2,y2] rows (NaN where s*r < 0), into out if given"""
+        if out is None:
+            out = np.empty((len(X), 4))
+        with np.errstate(invalid='ignore'):
+            w = np.sqrt(X[:, 2] * X[:, 3])
+        h = X[:, 2] / (w + 1e-6)
+        w /= 2.0
+        h /= 2.0
+        np.subtract(X[:, 0], w, out=out[:, 0])
+        np.subtract(X[:, 1], h, out=out[:, 1])
+        np.add(X[:, 0], w, out=out[:, 2])
+        np.add(X[:, 1], h, out=out[:, 3])
+        return out
 
 
 class DeepSORT:
@@ -118,8 +292,10 @@ class DeepSORT:
         self.max_age = max_age
         self.min_hits = min_hits
         self.iou_threshold = iou_threshold
-        self.trackers: List[KalmanTracker] = []
+        self.tracks = _BatchedKF()
         self.frame_count = 0
+        # Linear assignment solver: 'lap' (LAPJV, faster on sparse IoU matrices) or 'scipy'
+        self.assignment_backend = 'lap' if lap is not None else 'scipy'
         
     def update(self, detections: List[List[float]], frame: np.ndarray = None) -> List[Dict]:
         """
@@ -135,100 +311,83 @@ class DeepSORT:
         """
         self.frame_count += 1
         
-        # Predict new locations of existing trackers
-        trks = np.zeros((len(self.trackers), 5))
-        to_del = []
-        
-        for t, trk in enumerate(trks):
-            pos = self.trackers[t].predict()
-            trk[:] = [pos[0], pos[1], pos[2], pos[3], 0]
-            if np.any(np.isnan(pos)):
-                to_del.append(t)
+        tracks = self.tracks
+        dets = np.asarray(detections, dtype=np.float64).reshape(len(detections), -1) if len(detections) else np.empty((0, 5))
         
-        trks = np.ma.compress_rows(np.ma.masked_invalid(trks))
-        for t in reversed(to_del):
-            self.trackers.pop(t)
+        # Predict new locations of existing trackers
+        trks = tracks.predict_all()
+        valid = ~np.isnan(trks).any(axis=1)
+        if not valid.all():
+            tracks.keep(valid)
+            trks = trks[valid]
         
         # Match detections to trackers
         matched, unmatched_dets, unmatched_trks = self._associate_detections_to_trackers(
-            detections, trks
+            dets, trks
         )
         
         # Update matched trackers
-        for m in matched:
-            self.trackers[m[1]].update(detections[m[0]][:4])
+        if len(matched):
+            tracks.update_all(matched[:, 1], dets[matched[:, 0], :4])
         
         # Create new trackers for unmatched detections
-        for i in unmatched_dets:
-            trk = KalmanTracker(detections[i][:4])
-            self.trackers.append(trk)
+        if len(unmatched_dets):
+            tracks.add(dets[unmatched_dets, :4])
         
         # Return active tracks
-        ret = []
-        for trk in self.trackers:
-            if trk.time_since_update < 1 and (trk.hit_streak >= self.min_hits or self.frame_count <= self.min_hits):
-                bbox = trk.get_state()
-                ret.append({
-                    'id': trk.id,
-                    'bbox': bbox,
-                    'confidence': 1.0
-                })
+        active = (tracks.time_since_update < 1) & (
+            (tracks.hit_streak >= self.min_hits) | (self.frame_count <= self.min_hits)
+        )
+        bboxes = tracks._z_to_bbox(tracks.X[active])
+        ret = [
+            {'id': track_id, 'bbox': bbox, 'confidence': 1.0}
+            for track_id, bbox in zip(tracks.ids[active].tolist(), bboxes.tolist())
+        ]
         
         # Remove dead tracklets
-        self.trackers = [t for t in self.trackers if t.time_since_update < self.max_age]
+        tracks.keep(tracks.time_since_update < self.max_age)
         
         return ret
     
-    def _associate_detections_to_trackers(self, detections: List, trackers: np.ndarray) -> Tuple:
+    def _associate_detections_to_trackers(self, detections: np.ndarray, trackers: np.ndarray) -> Tuple:
         """
         Assign detections to tracked objects using IOU
         
+        Args:
+            detections: (D, >=4) array of [x1, y1, x2, y2, ...]
+            trackers: (T, >=4) array of predicted [x1, y1, x2, y2, ...]
+        
         Returns:
             matched_indices, unmatched_detections, unmatched_trackers
         """
         if len(trackers) == 0:
             return np.empty((0, 2), dtype=int), np.arange(len(detections)), np.empty((0, 5), dtype=int)
         
-        iou_matrix = np.zeros((len(detections), len(trackers)), dtype=np.float32)
-        
-        for d, det in enumerate(detections):
-            for t, trk in enumerate(trackers):
-                iou_matrix[d, t] = self._iou(det[:4], trk[:4])
+        iou_matrix = self._iou_batch(detections[:, :4], trackers[:, :4]).astype(np.float32)
         
         if min(iou_matrix.shape) > 0:
             a = (iou_matrix > self.iou_threshold).astype(np.int32)
             if a.sum(1).max() == 1 and a.sum(0).max() == 1:
                 matched_indices = np.stack(np.where(a), axis=1)
             else:
-                matched_indices = self._linear_assignment(-iou_matrix)
+                # Pairs below the threshold would be rejected after assignment anyway; zeroing
+                # them first keeps them from displacing valid pairs in the optimum
+                iou_matrix[iou_matrix < self.iou_threshold] = 0.0
+                matched_indices = self._linear_assignment(iou_matrix, maximize=True, backend=self.assignment_backend)
         else:
-            matched_indices = np.empty(shape=(0, 2))
-        
-        unmatched_detections = []
-        for d, det in enumerate(detections):
-            if d not in matched_indices[:, 0]:
-                unmatched_detections.append(d)
+            matched_indices = np.empty((0, 2), dtype=int)
         
-        unmatched_trackers = []
-        for t, trk in enumerate(trackers):
-            if t not in matched_indices[:, 1]:
-                unmatched_trackers.append(t)
+        det_matched = np.zeros(len(detections), dtype=bool)
+        det_matched[matched_indices[:, 0]] = True
+        trk_matched = np.zeros(len(trackers), dtype=bool)
+        trk_matched[matched_indices[:, 1]] = True
         
         # Filter out matched with low IOU
-        matches = []
-        for m in matched_indices:
-            if iou_matrix[m[0], m[1]] < self.iou_threshold:
-                unmatched_detections.append(m[0])
-                unmatched_trackers.append(m[1])
-            else:
-                matches.append(m.reshape(1, 2))
-        
-        if len(matches) == 0:
-            matches = np.empty((0, 2), dtype=int)
-        else:
-            matches = np.concatenate(matches, axis=0)
+        low = iou_matrix[matched_indices[:, 0], matched_indices[:, 1]] < self.iou_threshold
+        unmatched_detections = np.concatenate([np.flatnonzero(~det_matched), matched_indices[low, 0]])
+        unmatched_trackers = np.concatenate([np.flatnonzero(~trk_matched), matched_indices[low, 1]])
         
-        return matches, np.array(unmatched_detections), np.array(unmatched_trackers)
+        return matched_indices[~low], unmatched_detections, unmatched_trackers
     
     @staticmethod
     def _iou(bbox1: List[float], bbox2: List[float]) -> float:
@@ -248,7 +407,153 @@ class DeepSORT:
         return inter_area / (union_area + 1e-6)
     
     @staticmethod
-    def _linear_assignment(cost_matrix: np.ndarray) -> np.ndarray:
-        """Solve linear assignment problem"""
-        x, y = linear_sum_assignment(cost_matrix)
-        return np.array(list(zip(x, y)))
+    def _iou_batch(bboxes1: np.ndarray, bboxes2: np.ndarray) -> np.ndarray:
+        """
+        Calculate IOU between every pair of bboxes in one broadcast
+        
+        Args:
+            bboxes1: (D, 4) array of [x1, y1, x2, y2]
+            bboxes2: (T, 4) array of [x1, y1, x2, y2]
+            
+        Returns:
+            (D, T) IOU matrix
+        """
+        b1 = bboxes1[:, None, :]
+        b2 = bboxes2[None, :, :]
+        
+        w = np.minimum(b1[..., 2], b2[..., 2]) - np.maximum(b1[..., 0], b2[..., 0])
+        h = np.minimum(b1[..., 3], b2[..., 3]) - np.maximum(b1[..., 1], b2[..., 1])
+        
+        # Most pairs are far apart: only those overlapping on both axes get the full IOU
+        iou = np.zeros(w.shape)
+        d, t = np.nonzero((w > 0) & (h > 0))
+        if len(d):
+            inter_area = w[d, t] * h[d, t]
+            bbox1_area = (bboxes1[:, 2] - bboxes1[:, 0]) * (bboxes1[:, 3] - bboxes1[:, 1])
+            bbox2_area = (bboxes2[:, 2] - bboxes2[:, 0]) * (bboxes2[:, 3] - bboxes2[:, 1])
+            iou[d, t] = inter_area / (bbox1_area[d] + bbox2_area[t] - inter_area + 1e-6)
+        
+        return iou
+    
+    @staticmethod
+    def _linear_assignment(cost_matrix: np.ndarray, maximize: bool = False, backend: str = 'scipy') -> np.ndarray:
+        """
+        Solve linear assignment problem
+        
+        Args:
+            cost_matrix: (D, T) cost (or gain, if maximize) matrix
+            maximize: Treat the matrix as gains (SciPy solves it without a negated copy)
+            backend: 'lap' for LAPJV (falls back to SciPy when lap is not installed) or 'scipy'
+            
+        Returns:
+            (M, 2) array of matched (row, column) indices
+        """
+        if backend == 'lap' and lap is not None:
+            cost = np.ascontiguousarray(-cost_matrix if maximize else cost_matrix, dtype=np.float64)
+            _, x, _ = lap.lapjv(cost, extend_cost=True)
+            rows = np.flatnonzero(x >= 0)
+            return np.stack([rows, x[rows]], axis=1)
+        x, y = linear_sum_assignment(cost_matrix, maximize=maximize)
+        return np.stack([x, y], axis=1)
+
+
+def offline_filter(bboxes: np.ndarray) -> np.ndarray:
+    """
+    Kalman-filter one recorded track in log-depth with a parallel prefix scan
+    (Sarkka & Garcia-Fernandez, "Temporal Parallelization of Bayesian Smoothers")
+
+    For batch/eval post-processing of long videos. Same model and noise as the live
+    tracker, which starts from the first bbox and then predicts/updates per frame;
+    the live tracker's clamp on a negative scale velocity is not applied.
+
+    Args:
+        bboxes: (T, 4) array of [x1, y1, x2, y2] per frame, NaN rows where the
+            track was not detected (the first row must be a detection)
+
+    Returns:
+        (T, 4) array of filtered [x1, y1, x2, y2]
+    """
+    bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+    kf = _BatchedKF()
+    kf.add(bboxes[:1])
+    if len(bboxes) == 1:
+        return kf.get_state()
+
+    F = np.eye(7)
+    F[:3, 4:] = np.eye(3)
+    H = np.eye(4, 7)
+    Q, R = kf.Q, kf.R
+    x0, P0 = kf.X[0], kf.P[0]
+
+    # Scan elements (A, b, C, eta, J) of frames 1..T-1
+    z = _BatchedKF._bbox_to_z(bboxes[1:])
+    observed = ~np.isnan(z).any(axis=1)
+    n = len(z)
+    A = np.broadcast_to(F, (n, 7, 7)).copy()
+    b = np.zeros((n, 7, 1))
+    C = np.broadcast_to(Q, (n, 7, 7)).copy()
+    eta = np.zeros((n, 7, 1))
+    J = np.zeros((n, 7, 7))
+
+    # First element: the prior pushed through one predict
+    A[0] = 0.0
+    b[0, :, 0] = F @ x0
+    C[0] = F @ P0 @ F.T + Q
+
+    # Observed frames condition the transition on their measurement
+    S = H @ Q @ H.T + R
+    K = Q @ H.T @ np.linalg.inv(S)
+    HF = H @ F
+    G = HF.T @ np.linalg.inv(S)
+    rest = observed.copy()
+    rest[0] = False
+    A[rest] = F - K @ HF
+    b[rest] = K @ z[rest, :, None]
+    C[rest] = Q - K @ H @ Q
+    eta[rest] = G @ z[rest, :, None]
+    J[rest] = G @ HF
+    if observed[0]:
+        P1 = C[0]
+        S1 = H @ P1 @ H.T + R
+        K1 = P1 @ H.T @ np.linalg.inv(S1)
+        b[0, :, 0] += K1 @ (z[0] - H @ b[0, :, 0])
+        C[0] = P1 - K1 @ S1 @ K1.T
+
+    # Hillis-Steele inclusive scan: log2(T) rounds of batched combines
+    elems = (A, b, C, eta, J)
+    step = 1
+    while step < n:
+        combined = _scan_combine(tuple(e[:-step] for e in elems), tuple(e[step:] for e in elems))
+        elems = tuple(np.concatenate([e[:step], c]) for e, c in zip(elems, combined))
+        step *= 2
+
+    X = np.concatenate([x0[None], elems[1][:, :, 0]])
+    return _BatchedKF._z_to_bbox(X)
+
+
+def _scan_combine(earlier: Tuple, later: Tuple) -> Tuple:
+    """
+    Associative operator of the parallel Kalman filter, batched over the leading axis
+
+    Args:
+        earlier: (A, b, C, eta, J) of the earlier elements
+        later: (A, b, C, eta, J) of the later elements
+
+    Returns:
+        (A, b, C, eta, J) of the combined elements
+    """
+    A1, b1, C1, eta1, J1 = earlier
+    A2, b2, C2, eta2, J2 = later
+    I = np.eye(A1.shape[-1])
+    A1T = A1.transpose(0, 2, 1)
+
+    # (I + C1 J2)^-1 is shared by A, b and C; (I + J2 C1)^-1 is applied by solves
+    M = I + C1 @ J2
+    N = I + J2 @ C1
+    A2M = A2 @ np.linalg.inv(M)
+    A = A2M @ A1
+    b = A2M @ (b1 + C1 @ eta2) + b2
+    C = A2M @ C1 @ A2.transpose(0, 2, 1) + C2
+    eta = A1T @ np.linalg.solve(N, eta2 - J2 @ b1) + eta1
+    J = A1T @ np.linalg.solve(N, J2 @ A1) + J1
+    return A, b, C, eta, J
@@ -4,25 +4,48 @@ Handles video input from files, RTSP streams, or webcams
 """
 import cv2
 import numpy as np
-from typing import Optional, Tuple
+from collections import deque
+from functools import lru_cache
+from typing import Deque, Optional, Tuple
 import logging
+import os
+import re
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Hardware H.264 decoders tried in order: Jetson (NVDEC via V4L2), desktop NVIDIA (NVDEC), Intel (VA-API).
+# Each entry is the GStreamer fragment from the parsed H.264 stream to raw BGR/BGRx.
+_HW_DECODERS = (
+    'nvv4l2decoder ! nvvidconv ! video/x-raw,format=BGRx',
+    'nvh264dec',
+    'vaapih264dec',
+)
+
+
+@lru_cache(maxsize=1)
+def _gstreamer_available() -> bool:
+    """Check whether OpenCV was built with the GStreamer backend"""
+    match = re.search(r'GStreamer:\s*(\w+)', cv2.getBuildInformation())
+    return match is not None and match.group(1) == 'YES'
+
 
 class VideoStream:
     """Video stream reader supporting files, RTSP, and webcams"""
     
-    def __init__(self, source: str = "0", buffer_size: int = 1):
+    def __init__(self, source: str = "0", buffer_size: int = 1, use_hw: bool = True):
         """
         Initialize video stream
         
         Args:
             source: Video source - file path, RTSP URL, or webcam index (0, 1, etc.)
             buffer_size: Number of frames to buffer
+            use_hw: Decode H.264 files/RTSP streams in hardware through GStreamer when
+                OpenCV supports it, falling back to the default CPU decoder
         """
         self.source = source
         self.buffer_size = buffer_size
+        self.use_hw = use_hw
         self.cap = None
         self.fps = 30
         self.frame_width = 640
@@ -40,7 +63,9 @@ class VideoStream:
     
     def _initialize_capture(self):
         """Initialize video capture"""
-        self.cap = cv2.VideoCapture(self.source)
+        self.cap = self._open_hw_capture() if self.use_hw else None
+        if self.cap is None:
+            self.cap = cv2.VideoCapture(self.source)
         
         if not self.cap.isOpened():
             logger.error(f"Failed to open video source: {self.source}")
@@ -54,9 +79,50 @@ class VideoStream:
         self.frame_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         self.frame_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if self.total_frames <= 0 and self._is_file():
+            # GStreamer captures do not report a frame count; files must not look live
+            probe = cv2.VideoCapture(self.source)
+            self.total_frames = int(probe.get(cv2.CAP_PROP_FRAME_COUNT))
+            probe.release()
         
         logger.info(f"Initialized video stream: {self.frame_width}x{self.frame_height} @ {self.fps}fps")
     
+    def _is_file(self) -> bool:
+        """Check whether the source is a local file"""
+        return isinstance(self.source, str) and os.path.isfile(self.source)
+    
+    def _open_hw_capture(self) -> Optional[cv2.VideoCapture]:
+        """
+        Open the source through a GStreamer hardware-decode pipeline
+        
+        Returns:
+            Opened capture, or None if the source or build is unsupported or no
+            hardware decoder could be started
+        """
+        if not _gstreamer_available() or not isinstance(self.source, str):
+            return None
+        
+        if self.source.startswith('rtsp://'):
+            # Live: keep only the newest decoded frame in the sink
+            src = f'rtspsrc location={self.source} latency=0 ! rtph264depay ! h264parse'
+            sink = 'appsink drop=true max-buffers=1 sync=false'
+        elif self._is_file():
+            src = f'filesrc location="{self.source}" ! parsebin ! h264parse'
+            sink = 'appsink sync=false'
+        else:
+            return None
+        
+        for decoder in _HW_DECODERS:
+            pipeline = f'{src} ! {decoder} ! videoconvert ! video/x-raw,format=BGR ! {sink}'
+            cap = cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
+            if cap.isOpened():
+                logger.info(f"Hardware decoding with {decoder.split()[0]}")
+                return cap
+            cap.release()
+        
+        logger.info("No GStreamer hardware decoder available, decoding on the CPU")
+        return None
+    
     def read(self) -> Tuple[bool, Optional[np.ndarray]]:
         """
         Read next frame from stream
@@ -112,6 +178,90 @@ class VideoStream:
         return self.cap is not None and self.cap.isOpened()
 
 
+class FrameGrabber:
+    """Reads a VideoStream on a background thread into a bounded frame buffer"""
+    
+    def __init__(self, stream: VideoStream, drop_old: bool = True, maxsize: Optional[int] = None):
+        """
+        Initialize frame grabber
+        
+        Args:
+            stream: Opened video stream to read from
+            drop_old: Drop the oldest unread frame when the buffer is full (live sources:
+                always serve the newest frames, never build a backlog). If False the grabber
+                waits for the consumer instead, so no frame of a file is skipped.
+            maxsize: Frames decoded ahead of the consumer; defaults to 1 when dropping
+                and to the stream's buffer_size otherwise
+        """
+        self.stream = stream
+        self.drop_old = drop_old
+        self.maxsize = max(1, maxsize or (1 if drop_old else stream.buffer_size))
+        self._cond = threading.Condition()
+        self._frames: Deque[Tuple[bool, Optional[np.ndarray]]] = deque(maxlen=self.maxsize if drop_old else None)
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='frame-grabber', daemon=True)
+    
+    def start(self) -> 'FrameGrabber':
+        """Start the capture thread"""
+        self._thread.start()
+        return self
+    
+    def _run(self):
+        """Capture loop: read until the stream ends or stop() is called"""
+        while True:
+            with self._cond:
+                while len(self._frames) >= self.maxsize and not self.drop_old and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+            
+            ret, frame = self.stream.read()
+            
+            with self._cond:
+                self._frames.append((ret, frame))
+                self._cond.notify_all()
+            if not ret:
+                return
+    
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Wait for the next buffered frame (blocking)
+        
+        Returns:
+            (success, frame) tuple; (False, None) once stopped
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._frames or self._stopped)
+            if not self._frames:
+                return False, None
+            item = self._frames.popleft()
+            self._cond.notify_all()
+            return item
+    
+    def stop(self, timeout: float = 5.0):
+        """
+        Stop the capture thread and wake up any blocked read()
+        
+        Args:
+            timeout: Seconds to wait for an in-progress stream read to return
+        """
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning("Frame grabber still blocked in a stream read")
+    
+    def __enter__(self):
+        """Context manager entry (starts the capture thread)"""
+        return self.start()
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        self.stop()
+
+
 class VideoWriter:
     """Video writer for saving processed videos"""
     
@@ -1,6 +1,9 @@
 import { useEffect, useState } from 'react'
 import './AlertPanel.css'
 
+// Live alerts carry ts_ns (ns since the epoch); uploaded-video events an ISO timestamp
+const alertTime = (alert) => (alert.ts_ns != null ? new Date(alert.ts_ns / 1e6) : new Date(alert.timestamp))
+
 const AlertPanel = ({ alerts, maxAlerts = 10 }) => {
   const [displayAlerts, setDisplayAlerts] = useState([])
   const [audio] = useState(() => {
@@ -70,7 +73,7 @@ const AlertPanel = ({ alerts, maxAlerts = 10 }) => {
                 <span className="alert-icon">{getAlertIcon(alert.event_type)}</span>
                 <span className="alert-type">{formatEventType(alert.event_type)}</span>
                 <span className="alert-time">
-                  {new Date(alert.timestamp).toLocaleTimeString()}
+                  {alertTime(alert).toLocaleTimeString()}
                 </span>
               </div>
               <div className="alert-details">
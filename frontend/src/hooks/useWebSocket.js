@@ -1,15 +1,24 @@
 import { useState, useEffect, useRef, useCallback } from 'react'
 
+// Text frames are JSON; binary frames are zlib-compressed JSON
+const decodeMessage = (data) => {
+  if (typeof data === 'string') return data
+  const stream = new Blob([data]).stream().pipeThrough(new DecompressionStream('deflate'))
+  return new Response(stream).text()
+}
+
 const useWebSocket = (url, { maxBuffer = 200 } = {}) => {
   const [messages, setMessages] = useState([])
   const [lastMessage, setLastMessage] = useState(null)
   const [isConnected, setIsConnected] = useState(false)
   const ws = useRef(null)
   const reconnectTimeout = useRef(null)
+  const decodeChain = useRef(Promise.resolve())
 
   const connect = useCallback(() => {
     try {
       ws.current = new WebSocket(url)
+      ws.current.binaryType = 'arraybuffer'
 
       ws.current.onopen = () => {
         console.log('WebSocket connected')
@@ -24,20 +33,24 @@ const useWebSocket = (url, { maxBuffer = 200 } = {}) => {
       }
 
       ws.current.onmessage = (event) => {
-        try {
-          const data = JSON.parse(event.data)
-          setLastMessage(data)
-          setMessages((prev) => {
-            const next = [...prev, data]
-            // Cap buffer to prevent unbounded growth causing freezes
-            if (next.length > maxBuffer) {
-              return next.slice(next.length - maxBuffer)
-            }
-            return next
+        // Compressed (?compress=deflate) messages arrive as binary frames; decode them in arrival order
+        decodeChain.current = decodeChain.current
+          .then(() => decodeMessage(event.data))
+          .then((text) => {
+            const data = JSON.parse(text)
+            setLastMessage(data)
+            setMessages((prev) => {
+              const next = [...prev, data]
+              // Cap buffer to prevent unbounded growth causing freezes
+              if (next.length > maxBuffer) {
+                return next.slice(next.length - maxBuffer)
+              }
+              return next
+            })
+          })
+          .catch((error) => {
+            console.error('Failed to parse WebSocket message:', error)
           })
-        } catch (error) {
-          console.error('Failed to parse WebSocket message:', error)
-        }
       }
 
       ws.current.onerror = (error) => {
@@ -35,6 +35,8 @@ const Dashboard = () => {
   const zoneRef = useRef(null)
 
   const wsUrl = (API_BASE.replace(/^http/, 'ws') + '/api/stream/ws').replace(/([^:])\/\//g, '$1//')
+    // Live updates are sent zlib-compressed when the browser can decompress them
+    + (typeof DecompressionStream !== 'undefined' ? '?compress=deflate' : '')
   const { messages, lastMessage, sendMessage, isConnected } = useWebSocket(wsUrl, { maxBuffer: 200 })
 
   useEffect(() => {
@@ -56,6 +58,19 @@ const Dashboard = () => {
           currentCount: msg.count,
         }))
         // no-op UI logs for detection bursts; keep lightweight
+      } else if (msg.type === 'frame_update') {
+        // Live stream: one message per frame with its detections, tracks and alerts
+        const frameAlerts = msg.alerts || []
+        if (frameAlerts.length) {
+          setAlerts((prev) => [...prev, ...frameAlerts])
+          setLastAlert(frameAlerts[frameAlerts.length - 1])
+        }
+        setStats((prev) => ({
+          ...prev,
+          totalDetections: prev.totalDetections + msg.count,
+          currentCount: msg.count,
+          totalAlerts: prev.totalAlerts + frameAlerts.length,
+        }))
       } else if (msg.type === 'live_started') {
         setLiveRunning(true)
       } else if (msg.type === 'live_stopped') {
@@ -6,6 +6,17 @@ import numpy as np
 from typing import List, Tuple, Dict
 import json
 import argparse
+import sys
+from pathlib import Path
+from scipy.optimize import linear_sum_assignment
+
+try:
+    from orjson import loads as _loads
+except ImportError:  # orjson is optional; the standard library parser gives the same result
+    _loads = json.loads
+
+# Backend package root, for the tracker's offline Kalman filter
+_BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
 
 
 def calculate_iou(box1: List[float], box2: List[float]) -> float:
@@ -25,6 +36,26 @@ def calculate_iou(box1: List[float], box2: List[float]) -> float:
     return inter_area / (union_area + 1e-6)
 
 
+def calculate_iou_matrix(boxes1: List[List[float]], boxes2: List[List[float]]) -> np.ndarray:
+    """
+    Calculate IOU between every pair of boxes in one broadcast
+    
+    Returns:
+        (len(boxes1), len(boxes2)) IOU matrix
+    """
+    b1 = np.asarray(boxes1, dtype=np.float32).reshape(len(boxes1), -1)[:, None, :4]
+    b2 = np.asarray(boxes2, dtype=np.float32).reshape(len(boxes2), -1)[None, :, :4]
+    
+    w = np.clip(np.minimum(b1[..., 2], b2[..., 2]) - np.maximum(b1[..., 0], b2[..., 0]), 0, None)
+    h = np.clip(np.minimum(b1[..., 3], b2[..., 3]) - np.maximum(b1[..., 1], b2[..., 1]), 0, None)
+    inter_area = w * h
+    
+    box1_area = (b1[..., 2] - b1[..., 0]) * (b1[..., 3] - b1[..., 1])
+    box2_area = (b2[..., 2] - b2[..., 0]) * (b2[..., 3] - b2[..., 1])
+    
+    return inter_area / (box1_area + box2_area - inter_area + 1e-6)
+
+
 def match_detections(
     predictions: List[List[float]], 
     ground_truths: List[List[float]], 
@@ -36,25 +67,14 @@ def match_detections(
     Returns:
         (true_positives, false_positives, false_negatives)
     """
-    matched_gt = set()
-    true_positives = 0
+    if len(predictions) == 0 or len(ground_truths) == 0:
+        return 0, len(predictions), len(ground_truths)
     
-    for pred in predictions:
-        best_iou = 0
-        best_gt_idx = -1
-        
-        for gt_idx, gt in enumerate(ground_truths):
-            if gt_idx in matched_gt:
-                continue
-            
-            iou = calculate_iou(pred, gt)
-            if iou > best_iou:
-                best_iou = iou
-                best_gt_idx = gt_idx
-        
-        if best_iou >= iou_threshold:
-            true_positives += 1
-            matched_gt.add(best_gt_idx)
+    # Optimal one-to-one matching; pairs below the threshold cannot count as a match
+    iou = calculate_iou_matrix(predictions, ground_truths)
+    iou[iou < iou_threshold] = 0.0
+    rows, cols = linear_sum_assignment(iou, maximize=True)
+    true_positives = int(np.count_nonzero(iou[rows, cols] >= iou_threshold))
     
     false_positives = len(predictions) - true_positives
     false_negatives = len(ground_truths) - true_positives
@@ -62,6 +82,42 @@ def match_detections(
     return true_positives, false_positives, false_negatives
 
 
+def filter_tracks(frame_tracks: List[List[Dict]]) -> List[List[List[float]]]:
+    """
+    Kalman-filter recorded tracks over the whole video before matching
+    (offline parallel-scan filter of the tracker, one pass per track)
+    
+    Args:
+        frame_tracks: Tracks of each frame, as returned by the tracker
+            ({'id': int, 'bbox': [x1, y1, x2, y2], ...})
+            
+    Returns:
+        Filtered [x1, y1, x2, y2] boxes of each frame, in the input order
+    """
+    if str(_BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(_BACKEND_DIR))
+    from tracking.deepsort import offline_filter
+    
+    # {track_id: [(frame index, position in frame)]}
+    appearances: Dict[int, List[Tuple[int, int]]] = {}
+    for f, tracks in enumerate(frame_tracks):
+        for i, track in enumerate(tracks):
+            appearances.setdefault(track['id'], []).append((f, i))
+    
+    filtered = [[None] * len(tracks) for tracks in frame_tracks]
+    for track_id, seen in appearances.items():
+        # One row per frame from the first to the last appearance, NaN where missed
+        first = seen[0][0]
+        bboxes = np.full((seen[-1][0] - first + 1, 4), np.nan)
+        for f, i in seen:
+            bboxes[f - first] = frame_tracks[f][i]['bbox'][:4]
+        states = offline_filter(bboxes).tolist()
+        for f, i in seen:
+            filtered[f][i] = states[f - first]
+    
+    return filtered
+
+
 def calculate_metrics(
     all_predictions: List[List[List[float]]], 
     all_ground_truths: List[List[List[float]]],
@@ -117,11 +173,13 @@ def calculate_counting_metrics(
     Returns:
         Dictionary with MAE, MSE, RMSE
     """
-    predicted_counts = np.array(predicted_counts)
-    ground_truth_counts = np.array(ground_truth_counts)
+    diff = np.subtract(np.asarray(predicted_counts, dtype=np.float64),
+                       np.asarray(ground_truth_counts, dtype=np.float64))
     
-    mae = np.mean(np.abs(predicted_counts - ground_truth_counts))
-    mse = np.mean((predicted_counts - ground_truth_counts) ** 2)
+    # One scratch array reused for |diff| and diff^2
+    scratch = np.empty_like(diff)
+    mae = np.mean(np.abs(diff, out=scratch))
+    mse = np.mean(np.multiply(diff, diff, out=scratch))
     rmse = np.sqrt(mse)
     
     return {
@@ -186,22 +244,29 @@ def main():
     parser.add_argument('--ground_truth', type=str, required=True, help='Path to ground truth JSON file')
     parser.add_argument('--iou_threshold', type=float, default=0.5, help='IOU threshold for detection matching')
     parser.add_argument('--output', type=str, default='evaluation_results.json', help='Output file for results')
+    parser.add_argument('--filter_tracks', action='store_true',
+                        help='Match Kalman-filtered boxes of the recorded tracks ("tracks" in the predictions)')
     
     args = parser.parse_args()
     
     # Load predictions and ground truth
-    with open(args.predictions, 'r') as f:
-        predictions_data = json.load(f)
-    
-    with open(args.ground_truth, 'r') as f:
-        ground_truth_data = json.load(f)
+    predictions_data = _loads(Path(args.predictions).read_bytes())
+    ground_truth_data = _loads(Path(args.ground_truth).read_bytes())
     
     print("Evaluating detection performance...")
     
+    predicted_detections = predictions_data.get('detections')
+    if args.filter_tracks:
+        if 'tracks' in predictions_data:
+            predicted_detections = filter_tracks(predictions_data['tracks'])
+            print("Using Kalman-filtered track boxes as detections")
+        else:
+            print("No track data found, --filter_tracks ignored")
+    
     # Calculate detection metrics
-    if 'detections' in predictions_data and 'detections' in ground_truth_data:
+    if predicted_detections is not None and 'detections' in ground_truth_data:
         detection_metrics = calculate_metrics(
-            predictions_data['detections'],
+            predicted_detections,
             ground_truth_data['detections'],
             args.iou_threshold
         )
@@ -7,6 +7,24 @@ import os
 import sys
 from pathlib import Path
 
+def _list_files(paths):
+    """
+    Find which of the given file paths exist, listing each parent directory once
+    (no recursive walk, which would descend into node_modules/ and .git/)
+    """
+    present = set()
+    listings = {}
+    for path in paths:
+        parent = path.parent
+        if parent not in listings:
+            try:
+                listings[parent] = {entry.name for entry in os.scandir(parent) if entry.is_file()}
+            except OSError:
+                listings[parent] = set()
+        if path.name in listings[parent]:
+            present.add(path)
+    return present
+
 def check_structure():
     """Verify project structure"""
     print("🔍 Verifying Crowd Anomaly Detection System Setup...\n")
@@ -70,13 +88,15 @@ def check_structure():
     all_good = True
     total_files = 0
     found_files = 0
+    present = _list_files(Path(directory) / file_path
+                          for directory, files in required_structure.items() for file_path in files)
     
     for directory, files in required_structure.items():
         print(f"📁 Checking {directory}/")
         for file_path in files:
             total_files += 1
             full_path = Path(directory) / file_path
-            if full_path.exists():
+            if full_path in present:
                 print(f"  ✅ {file_path}")
                 found_files += 1
             else: